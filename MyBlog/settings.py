@@ -44,12 +44,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django.contrib.sitemaps',  # For SEO
     'chebitoch',
-    'django_ckeditor_5',
+    'chebitoch.apps.CKEditor5Config',  # django_ckeditor_5, minus unused boot-time signals
     'storages',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'chebitoch.middleware.PerformanceMiddleware',  # Per-request timing, query counts, N+1 warnings
+    'chebitoch.middleware.ReplicaMiddleware',  # Anonymous reads go to DATABASE_REPLICA_URLS
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files efficiently
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,6 +75,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'chebitoch.context_processors.trending',
             ],
         },
     },
@@ -88,6 +91,18 @@ DATABASES = {
 # Connection pooling for better performance
 DATABASES['default']['CONN_MAX_AGE'] = 600
 
+# Read replicas for anonymous GETs (chebitoch.routers); reads stay on the primary when unset
+DATABASE_REPLICA_URLS = env.list("DATABASE_REPLICA_URLS", default=[])
+for _index, _url in enumerate(DATABASE_REPLICA_URLS):
+    DATABASES[f'replica_{_index}'] = env.db_url_config(_url)
+    DATABASES[f'replica_{_index}']['CONN_MAX_AGE'] = 600
+    DATABASES[f'replica_{_index}']['TEST'] = {'MIRROR': 'default'}
+if DATABASE_REPLICA_URLS:
+    DATABASE_ROUTERS = ['chebitoch.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=15)
+REPLICA_HEALTH_INTERVAL = env.int("REPLICA_HEALTH_INTERVAL", default=5)
+REPLICA_RETRY_AFTER = env.int("REPLICA_RETRY_AFTER", default=30)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -141,6 +156,58 @@ else:
         }
     }
 
+# Seconds between write-behind flushes of buffered post view counts
+VIEW_COUNT_FLUSH_INTERVAL = env.int("VIEW_COUNT_FLUSH_INTERVAL", default=30)
+
+# Seconds an anonymous rendered page stays cached (edits purge it earlier)
+PAGE_CACHE_TIMEOUT = env.int("PAGE_CACHE_TIMEOUT", default=600)
+
+# Pre-rendered sitemaps (see the build_sitemaps command)
+SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+SITEMAP_DOMAIN = env("SITEMAP_DOMAIN", default=None)
+SITEMAP_SECTION_SIZE = env.int("SITEMAP_SECTION_SIZE", default=5000)
+
+# Static copies of the public pages (see the bake command)
+BAKE_ROOT = env("BAKE_ROOT", default=str(BASE_DIR / 'baked'))
+
+# Comments rendered inline on a post; the rest load in pages of COMMENTS_PAGE_SIZE
+COMMENTS_INLINE = env.int("COMMENTS_INLINE", default=10)
+COMMENTS_PAGE_SIZE = env.int("COMMENTS_PAGE_SIZE", default=20)
+
+# Featured image renditions (chebitoch.images); built in the background when a post's image changes
+IMAGE_VARIANT_WIDTHS = tuple(env.list("IMAGE_VARIANT_WIDTHS", cast=int, default=[320, 640, 960, 1280, 1920]))
+IMAGE_VARIANTS_ON_SAVE = env.bool("IMAGE_VARIANTS_ON_SAVE", default=True)
+
+# Search suggestions (chebitoch.suggest): version check and full rebuild intervals
+SUGGEST_REFRESH_SECONDS = env.int("SUGGEST_REFRESH_SECONDS", default=2)
+SUGGEST_REBUILD_SECONDS = env.int("SUGGEST_REBUILD_SECONDS", default=3600)
+
+# Trending leaderboard: hourly buckets, decayed by half every TRENDING_HALF_LIFE_HOURS
+TRENDING_WINDOW_HOURS = env.int("TRENDING_WINDOW_HOURS", default=48)
+TRENDING_HALF_LIFE_HOURS = env.int("TRENDING_HALF_LIFE_HOURS", default=12)
+TRENDING_REFRESH_SECONDS = env.int("TRENDING_REFRESH_SECONDS", default=60)
+
+# Seconds between rollups of buffered post hits into daily analytics (see the rollup_analytics command)
+ANALYTICS_ROLLUP_INTERVAL = env.int("ANALYTICS_ROLLUP_INTERVAL", default=300)
+
+# Shared HTTP cache in front of Django (chebitoch.surrogate): per-view Cache-Control
+# overrides, e.g. {'default': {'s_maxage': 600}, 'post_detail': {'s_maxage': 60}}
+SURROGATE_CACHE_POLICIES = env.json("SURROGATE_CACHE_POLICIES", default={})
+# Caches to send PURGE requests to when posts, comments or categories change
+SURROGATE_PURGE_ENDPOINTS = env.list("SURROGATE_PURGE_ENDPOINTS", default=[])
+SURROGATE_PURGE_METHOD = env("SURROGATE_PURGE_METHOD", default="PURGE")
+SURROGATE_PURGE_HEADER = env("SURROGATE_PURGE_HEADER", default="Surrogate-Key")
+
+# Admin changelists: filtered counts stop here; bulk actions over more rows are queued for the process_comments worker
+ADMIN_COUNT_LIMIT = env.int("ADMIN_COUNT_LIMIT", default=10000)
+ADMIN_ASYNC_ACTION_THRESHOLD = env.int("ADMIN_ASYNC_ACTION_THRESHOLD", default=1000)
+
+# ================== PERFORMANCE METRICS ==================
+PERF_METRICS_ENABLED = env.bool("PERF_METRICS_ENABLED", default=True)
+PERF_SERVER_TIMING = env.bool("PERF_SERVER_TIMING", default=DEBUG)
+# Flag a request when one SQL shape repeats more than this many times
+PERF_N_PLUS_ONE_THRESHOLD = env.int("PERF_N_PLUS_ONE_THRESHOLD", default=10)
+
 # ================== AWS S3 SETTINGS ==================
 if env("AWS_ACCESS_KEY_ID", default=None):
     AWS_ACCESS_KEY_ID = env("AWS_ACCESS_KEY_ID")
@@ -230,5 +297,10 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'chebitoch.perf': {
+            'handlers': ['console'],
+            'level': env("PERF_LOG_LEVEL", default='INFO'),
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
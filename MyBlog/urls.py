@@ -1,29 +1,29 @@
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from django.contrib.sitemaps.views import sitemap
 from django.views.generic import TemplateView
-from chebitoch.sitemaps import PostSitemap, CategorySitemap, StaticViewSitemap
+from chebitoch.sitemaps import sitemap_index, sitemap_section
 from django.conf import settings
-
-sitemaps = {
-    'posts': PostSitemap,
-    'categories': CategorySitemap,
-    'static': StaticViewSitemap,
-}
+from django.utils.module_loading import import_string
 
 # Normalize ADMIN_URL from settings (strip leading/trailing slashes)
 _admin_route = getattr(settings, 'ADMIN_URL', 'admin')
 _admin_route = _admin_route.strip('/')  # ensure no leading/trailing slashes
 
 
+def ckeditor_upload(request, *args, **kwargs):
+    """CKEditor image uploads; the view (and Pillow/storage it needs) is imported on first use"""
+    return import_string('django_ckeditor_5.views.upload_file')(request, *args, **kwargs)
+
+
 urlpatterns = [
     path(f'{_admin_route}/', admin.site.urls),
     path('', include('chebitoch.urls')),
-    path("ckeditor5/", include('django_ckeditor_5.urls')),
+    path("ckeditor5/image_upload/", ckeditor_upload, name="ck_editor_5_upload_file"),
 
     # SEO URLs
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap.xml', sitemap_index, name='django.contrib.sitemaps.views.sitemap'),
+    path('sitemap-<section>.xml', sitemap_section, name='sitemap_section'),
     path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain"), name='robots'),
 ]
 if settings.DEBUG:
@@ -1,4 +1,9 @@
 #!/usr/bin/env bash
+# Build step only. Comments and bulk approvals are applied by a separate,
+# long-running `python manage.py process_comments` worker, buffered view
+# counts by `flush_view_counts --interval 30` and analytics hits by
+# `rollup_analytics --interval 300` (see Procfile); without them, submitted
+# comments never reach moderation and counts only move on later hits.
 # exit on error
 set -o errexit
 
@@ -6,4 +11,17 @@ pip install --upgrade pip
 pip install -r requirements.txt
 
 python3 manage.py collectstatic --noinput
-python3 manage.py migrate
\ No newline at end of file
+python3 manage.py migrate
+python3 manage.py rerender_content
+python3 manage.py rebuild_search_index --missing
+python3 manage.py build_related_posts --missing
+if [ "$BUILD_IMAGE_VARIANTS_ON_DEPLOY" = "1" ]; then
+    python3 manage.py build_image_variants
+fi
+if [ -n "$SITEMAP_DOMAIN" ]; then
+    python3 manage.py build_sitemaps
+fi
+if [ "$WARM_CACHE_ON_DEPLOY" = "1" ]; then
+    # Needs SITEMAP_DOMAIN for the Host of the warmed pages; fails without it
+    python3 manage.py warm_cache
+fi
@@ -1,12 +1,63 @@
-from django.contrib import admin
-from .models import Post, Category, Comment
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from .analytics import daily_views, top_posts
+from .comments import approve_comments, content_search, request_approval
+from .models import Post, Category, Comment, CommentApproval, CommentSubmission, PostDailyStats
+from .pagination import EstimatedCountPaginator
+from .search import search_post_ids
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists that stay fast on big tables.
+
+    Counts are estimated or bounded (EstimatedCountPaginator), the "N total"
+    link and sidebar facet counts are off, and the rows load only
+    ``list_only`` columns (plus ``list_select_related``).
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    list_only = None
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        opts = self.model._meta
+        if self.list_only and match and match.url_name == f'{opts.app_label}_{opts.model_name}_changelist':
+            queryset = queryset.only(*self.list_only)
+        return queryset
+
+
+def views_bar_chart(series):
+    """Inline bar chart of [(date, views, uniques)], one bar per day"""
+    peak = max((views for _, views, _ in series), default=0) or 1
+    bars = format_html_join(
+        '', '<span title="{}: {} views, ~{} unique" style="display:inline-block;width:{}%;height:{}px;'
+        'margin-right:1px;background:#417690;vertical-align:bottom"></span>',
+        (
+            (day.isoformat(), views, uniques, round(90 / len(series), 2), max(1, round(80 * views / peak)))
+            for day, views, uniques in series
+        ),
+    )
+    total = sum(views for _, views, _ in series)
+    return format_html(
+        '<div style="height:80px;white-space:nowrap">{}</div><div>{} views over {} days (peak {}/day)</div>',
+        bars, total, len(series), peak if total else 0,
+    )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = ['title', 'category', 'status', 'created_at', 'views_count']
     list_filter = ['status', 'category', 'created_at']
-    search_fields = ['title', 'content', 'keywords']
+    list_select_related = ['category']
+    list_only = ['title', 'category__name', 'status', 'created_at', 'views_count']
+    # Body text is matched through the search index, see get_search_results
+    search_fields = ['title', 'keywords']
     prepopulated_fields = {'slug': ('title',)}
 
     fieldsets = (
@@ -22,12 +73,27 @@ class PostAdmin(admin.ModelAdmin):
             'description': 'Leave blank to auto-generate from content'
         }),
         ('Statistics', {
-            'fields': ('views_count',),
+            'fields': ('views_count', 'views_last_30_days'),
             'classes': ('collapse',)
         })
     )
 
-    readonly_fields = ['views_count']
+    readonly_fields = ['views_count', 'views_last_30_days']
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            # Only published posts are indexed; drafts match on title and keywords
+            post_ids = search_post_ids(search_term)
+            if post_ids:
+                results |= queryset.filter(pk__in=post_ids)
+        return results, may_have_duplicates
+
+    @admin.display(description='Last 30 days')
+    def views_last_30_days(self, obj):
+        if obj.pk is None:
+            return '-'
+        return views_bar_chart(daily_views(30, post_id=obj.pk))
 
 
 @admin.register(Category)
@@ -47,13 +113,81 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ['name', 'post', 'created_at', 'active']
     list_filter = ['active', 'created_at']
-    search_fields = ['name', 'email', 'content']
+    list_select_related = ['post']
+    list_only = ['name', 'created_at', 'active', 'post__title']
+    # Newest first on the primary key; created_at alone has no index
+    ordering = ['-pk']
+    # Exact (indexed) email lookups and name matches; content goes through content_search
+    search_fields = ['=email', 'name']
     actions = ['approve_comments']
 
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(content_search(search_term))
+        return results, may_have_duplicates
+
     def approve_comments(self, request, queryset):
-        queryset.update(active=True)
+        threshold = getattr(settings, 'ADMIN_ASYNC_ACTION_THRESHOLD', 1000)
+        pending = queryset.filter(active=False)
+        if pending[:threshold + 1].count() > threshold:
+            queued = request_approval(queryset, request.user)
+            self.message_user(
+                request, f"Queued approval of {queued} comments; "
+                "the process_comments worker will apply it shortly.", messages.INFO
+            )
+            return
+        approved = approve_comments(queryset)
+        self.message_user(request, f"Approved {approved} comment(s).", messages.SUCCESS)
+
+    approve_comments.short_description = "Approve selected comments"
+
+
+@admin.register(CommentSubmission)
+class CommentSubmissionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'post', 'submitted_at', 'processed_at']
+    list_filter = ['processed_at']
+    list_select_related = ['post']
+    readonly_fields = ['post', 'name', 'email', 'content', 'submitted_at', 'processed_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CommentApproval)
+class CommentApprovalAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'requested_by', 'requested_at', 'processed_at', 'approved', 'error']
+    list_filter = ['processed_at']
+    list_select_related = ['requested_by']
+    readonly_fields = ['requested_by', 'requested_at', 'started_at', 'processed_at', 'approved', 'error']
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(PostDailyStats)
+class PostDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['post', 'date', 'views', 'unique_visitors_estimate']
+    list_filter = ['date']
+    list_select_related = ['post']
+    date_hierarchy = 'date'
+    readonly_fields = ['post', 'date', 'views', 'unique_visitors_estimate', 'referrers']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-    approve_comments.short_description = "Approve selected comments"
\ No newline at end of file
+    def changelist_view(self, request, extra_context=None):
+        today = timezone.localdate()
+        extra_context = {
+            'views_chart': views_bar_chart(daily_views(30)),
+            'top_week': top_posts(today - timedelta(days=6), today),
+            'top_month': top_posts(today - timedelta(days=29), today),
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context)
@@ -0,0 +1,256 @@
+"""Daily per-post analytics rolled up from buffered hits.
+
+Each post view appends one compact entry (day, post, hashed visitor,
+referring host) to a buffer: a Redis list on django_redis, a process-local
+list otherwise. ``rollup_hits`` drains the buffer and folds it into one
+PostDailyStats row per post and day: views are summed, visitors go into a
+HyperLogLog sketch (chebitoch.hll) and referrers into per-host counts.
+Reports (``top_posts``, ``daily_views``) read only those rows.
+
+Visitors are identified by a keyed hash of address and user agent that
+changes every day, so nothing personal is stored and a visitor is only
+"unique" within a day; range uniques merge the daily sketches.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .cache_backend import claim_batches, get_redis, release_batches
+from .hll import HyperLogLog
+from .models import Post, PostDailyStats
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'analytics:hits'
+ROLLUP_LOCK_KEY = 'analytics:rollup-lock'
+MAX_REFERRERS = 50
+
+_local_buffer = []
+_local_lock = threading.Lock()
+_last_rollup = time.monotonic()
+
+
+def rollup_interval():
+    return getattr(settings, 'ANALYTICS_ROLLUP_INTERVAL', 300)
+
+
+def visitor_id(request, day):
+    # The last hop is the one our own proxy appended; earlier ones are client-supplied
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[-1].strip()
+    address = forwarded or request.META.get('REMOTE_ADDR', '')
+    agent = request.META.get('HTTP_USER_AGENT', '')
+    return salted_hmac('chebitoch.analytics', f'{day}|{address}|{agent}').hexdigest()[:16]
+
+
+def referrer_host(request):
+    """Host of an external Referer, or '' for direct visits and internal navigation"""
+    host = urlsplit(request.META.get('HTTP_REFERER', '')).hostname or ''
+    if host and host == request.get_host().split(':')[0]:
+        return ''
+    return host[:100]
+
+
+def record_visit(request, post_id):
+    """Buffer one view of a post; a single append, no database write."""
+    day = timezone.localdate().isoformat()
+    entry = f'{day}|{post_id}|{visitor_id(request, day)}|{referrer_host(request)}'
+    client = get_redis()
+    if client is not None:
+        client.rpush(cache.make_key(BUFFER_KEY), entry)
+    else:
+        with _local_lock:
+            _local_buffer.append(entry)
+    _maybe_rollup(client)
+
+
+def _maybe_rollup(client):
+    global _last_rollup
+    now = time.monotonic()
+    if now - _last_rollup < rollup_interval():
+        return
+    with _local_lock:
+        if now - _last_rollup < rollup_interval():
+            return
+        _last_rollup = now
+    # With Redis the buffer is shared, so only one worker per interval rolls it up
+    if client is not None and not cache.add(ROLLUP_LOCK_KEY, 1, rollup_interval()):
+        return
+    threading.Thread(target=_rollup_in_background, daemon=True).start()
+
+
+def _rollup_in_background():
+    try:
+        rollup_hits()
+    except Exception:
+        logger.exception('Failed to roll up buffered analytics hits')
+    finally:
+        connection.close()
+
+
+def rollup_hits():
+    """Fold buffered hits into PostDailyStats. Returns the number of hits rolled up.
+
+    Redis batches are only deleted after the rows commit; a rollup that
+    fails or dies leaves them to the next one.
+    """
+    client = get_redis()
+    if client is None:
+        return _rollup_local()
+
+    batches = claim_batches(client, cache.make_key(BUFFER_KEY), 'rolling-up')
+    entries = [entry.decode() for batch in batches for entry in client.lrange(batch, 0, -1)]
+    try:
+        with transaction.atomic():
+            _apply(_aggregate(entries))
+            transaction.on_commit(lambda: release_batches(client, batches))
+    except Exception:
+        release_batches(client, batches, processed=False)
+        raise
+    return len(entries)
+
+
+def _rollup_local():
+    with _local_lock:
+        entries = list(_local_buffer)
+        _local_buffer.clear()
+    if not entries:
+        return 0
+    try:
+        _apply(_aggregate(entries))
+    except Exception:
+        with _local_lock:
+            _local_buffer[:0] = entries
+        raise
+    return len(entries)
+
+
+def _aggregate(entries):
+    """{(post_id, day): (views, sketch, referrers)} from buffer entries"""
+    stats = {}
+    for entry in entries:
+        try:
+            day, post_id, visitor, host = entry.split('|', 3)
+            key = (int(post_id), date.fromisoformat(day))
+        except ValueError:
+            logger.warning('Skipping malformed analytics entry %r', entry)
+            continue
+        if key not in stats:
+            stats[key] = [0, HyperLogLog(), Counter()]
+        current = stats[key]
+        current[0] += 1
+        current[1].add(visitor)
+        if host:
+            current[2][host] += 1
+    return stats
+
+
+def _apply(stats):
+    # Hits for posts deleted since they were buffered are dropped
+    live = set(Post.objects.filter(pk__in={post_id for post_id, _ in stats}).values_list('pk', flat=True))
+    stats = {key: value for key, value in stats.items() if key[0] in live}
+    if not stats:
+        return
+
+    by_day = defaultdict(list)
+    for post_id, day in stats:
+        by_day[day].append(post_id)
+    lookup = Q()
+    for day, post_ids in by_day.items():
+        lookup |= Q(date=day, post_id__in=post_ids)
+
+    with transaction.atomic():
+        existing = {
+            (row.post_id, row.date): row
+            for row in PostDailyStats.objects.select_for_update().filter(lookup)
+        }
+        created, updated = [], []
+        for (post_id, day), (views, sketch, referrers) in stats.items():
+            row = existing.get((post_id, day))
+            if row is None:
+                row = PostDailyStats(post_id=post_id, date=day)
+                created.append(row)
+            else:
+                sketch.merge(HyperLogLog.from_bytes(row.visitors_sketch))
+                referrers.update(row.referrers)
+                updated.append(row)
+            row.views += views
+            row.visitors_sketch = sketch.to_bytes()
+            row.unique_visitors_estimate = sketch.count()
+            row.referrers = dict(referrers.most_common(MAX_REFERRERS))
+        PostDailyStats.objects.bulk_create(created)
+        PostDailyStats.objects.bulk_update(
+            updated, ['views', 'visitors_sketch', 'unique_visitors_estimate', 'referrers']
+        )
+
+
+def top_posts(start, end=None, limit=10):
+    """Most viewed posts from ``start`` to ``end`` (inclusive, default today), from the rollups only.
+
+    Returns dicts with ``post``, ``views``, ``unique_visitors`` (merged
+    sketches, so a visitor seen on several days counts once per day) and
+    ``referrers`` (the top hosts).
+    """
+    end = end or timezone.localdate()
+    in_range = PostDailyStats.objects.filter(date__range=(start, end))
+    totals = list(
+        in_range.values('post').annotate(total=Sum('views')).order_by('-total', 'post')[:limit]
+    )
+    post_ids = [row['post'] for row in totals]
+    sketches = defaultdict(HyperLogLog)
+    referrers = defaultdict(Counter)
+    for post_id, sketch, hosts in in_range.filter(post__in=post_ids).values_list(
+        'post', 'visitors_sketch', 'referrers'
+    ):
+        sketches[post_id].merge(HyperLogLog.from_bytes(sketch))
+        referrers[post_id].update(hosts)
+
+    posts = Post.objects.only('title', 'slug').in_bulk(post_ids)
+    return [
+        {
+            'post': posts[row['post']],
+            'views': row['total'],
+            'unique_visitors': sketches[row['post']].count(),
+            'referrers': referrers[row['post']].most_common(5),
+        }
+        for row in totals
+    ]
+
+
+def daily_views(days=30, post_id=None):
+    """[(date, views, unique visitors)] for the last ``days`` days, oldest first, zero-filled.
+
+    Site-wide (no ``post_id``) uniques are the sum of per-post uniques.
+    """
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    rows = PostDailyStats.objects.filter(date__range=(start, end))
+    if post_id is not None:
+        rows = rows.filter(post_id=post_id)
+    by_day = {
+        row['date']: (row['views'], row['uniques'])
+        for row in rows.values('date').annotate(views=Sum('views'), uniques=Sum('unique_visitors_estimate'))
+    }
+    return [
+        (day, *by_day.get(day, (0, 0)))
+        for day in (start + timedelta(days=offset) for offset in range(days))
+    ]
+
+
+@atexit.register
+def _rollup_on_exit():
+    if get_redis() is None and _local_buffer:
+        try:
+            rollup_hits()
+        except Exception:
+            logger.exception('Failed to roll up buffered analytics hits on exit')
@@ -0,0 +1,206 @@
+"""Read-only JSON API over published posts and categories.
+
+    GET /api/posts/?fields=slug,title&category=<slug>&limit=20&after=<cursor>
+    GET /api/posts/<slug>/?fields=...
+    GET /api/categories/
+
+``fields`` selects the serialized fields and, through FIELD_COLUMNS, the
+columns loaded with ``.only()``. Listings use the same keyset cursors as
+the HTML pages. Responses get ETags and surrogate keys and go through the
+anonymous page cache, so the serialized payload is reused until a post
+or category signal bumps its tags. orjson is used when installed.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.urls import reverse
+
+from .conditional import conditional_page, make_etag
+from .models import Category, Post
+from .page_cache import cache_public_page
+from .pagination import InvalidCursor, KeysetPaginator
+from .surrogate import surrogate_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Public field -> model columns it needs (beyond pk)
+FIELD_COLUMNS = {
+    'id': [],
+    'slug': ['slug'],
+    'title': ['title'],
+    'url': ['slug'],
+    'excerpt': ['plain_excerpt'],
+    'category': ['category__name', 'category__slug'],
+    'author': ['author__username'],
+    'featured_image': ['featured_image'],
+    'images': ['featured_image', 'image_variants'],
+    'created_at': ['created_at'],
+    'updated_at': ['updated_at'],
+    'read_time': ['read_time'],
+    'word_count': ['word_count'],
+    'meta_description': ['meta_description'],
+    'content': ['rendered_content'],
+    'toc': ['toc'],
+}
+LIST_FIELDS = ['id', 'slug', 'title', 'url', 'excerpt', 'category', 'featured_image', 'created_at', 'read_time']
+DETAIL_FIELDS = LIST_FIELDS + ['author', 'updated_at', 'word_count', 'meta_description', 'images', 'content', 'toc']
+
+
+class InvalidParameter(ValueError):
+    pass
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def json_response(payload, status=200):
+    return HttpResponse(dumps(payload), content_type='application/json', status=status)
+
+
+def requested_fields(request, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in FIELD_COLUMNS]
+    if unknown:
+        raise InvalidParameter(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def post_queryset(fields):
+    columns = {'created_at'}  # the keyset cursor needs it
+    for field in fields:
+        columns.update(FIELD_COLUMNS[field])
+    queryset = Post.objects.filter(status='published').only(*columns)
+    related = sorted({column.split('__')[0] for column in columns if '__' in column})
+    return queryset.select_related(*related) if related else queryset
+
+
+def serialize_post(post, fields):
+    data = {}
+    for field in fields:
+        if field == 'id':
+            data['id'] = post.pk
+        elif field == 'url':
+            data['url'] = post.get_absolute_url()
+        elif field == 'excerpt':
+            data['excerpt'] = post.plain_excerpt
+        elif field == 'category':
+            data['category'] = post.category and {'name': post.category.name, 'slug': post.category.slug}
+        elif field == 'author':
+            data['author'] = post.author.username
+        elif field == 'images':
+            data['images'] = post.image_variants if post.image_variants.get('source') == post.featured_image else {}
+        elif field == 'content':
+            data['content'] = post.rendered_content
+        else:
+            data[field] = getattr(post, field)
+    return data
+
+
+def _posts_state(request):
+    posts = Post.objects.filter(status='published')
+    if request.GET.get('category'):
+        posts = posts.filter(category__slug=request.GET['category'])
+    last_modified = posts.aggregate(latest=Max('updated_at'))['latest']
+    return last_modified, make_etag(last_modified, 'home'), {}
+
+
+def _post_state(request, slug):
+    last_modified = Post.objects.filter(slug=slug, status='published').values_list('updated_at', flat=True).first()
+    if last_modified is None:
+        return None
+    return last_modified, make_etag(last_modified, f'post:{slug}'), {}
+
+
+def _categories_state(request):
+    return None, make_etag(None, 'categories', 'home'), {}
+
+
+@surrogate_cache('api_post_list', 'listing-home')
+@conditional_page(_posts_state)
+@cache_public_page('home')
+def post_list(request):
+    try:
+        fields = requested_fields(request, LIST_FIELDS)
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except InvalidParameter as exc:
+        return json_response({'error': str(exc)}, status=400)
+    except ValueError:
+        return json_response({'error': f'limit must be between 1 and {MAX_LIMIT}'}, status=400)
+
+    queryset = post_queryset(fields)
+    total_key = 'home'
+    if request.GET.get('category'):
+        queryset = queryset.filter(category__slug=request.GET['category'])
+        total_key = f"category:{request.GET['category']}"
+
+    paginator = KeysetPaginator(queryset, limit, total_key=total_key)
+    try:
+        page = paginator.page(after=request.GET.get('after'))
+    except InvalidCursor:
+        return json_response({'error': 'Invalid cursor'}, status=400)
+
+    next_url = None
+    if page.next_cursor:
+        query = request.GET.copy()
+        query['after'] = page.next_cursor
+        next_url = f'{request.path}?{query.urlencode()}'
+    return json_response({
+        'count': page.total,
+        'next': next_url,
+        'results': [serialize_post(post, fields) for post in page],
+    })
+
+
+@surrogate_cache('api_post_detail')
+@conditional_page(_post_state)
+@cache_public_page('post:{slug}')
+def post_detail(request, slug):
+    try:
+        fields = requested_fields(request, DETAIL_FIELDS)
+    except InvalidParameter as exc:
+        return json_response({'error': str(exc)}, status=400)
+
+    post = post_queryset(fields).filter(slug=slug).first()
+    if post is None:
+        return json_response({'error': 'Not found'}, status=404)
+    response = json_response(serialize_post(post, fields))
+    response.surrogate_keys = [f'post-{post.pk}']
+    return response
+
+
+@surrogate_cache('api_category_list', 'listing-home')
+@conditional_page(_categories_state)
+@cache_public_page('categories', 'home')
+def category_list(request):
+    categories = Category.objects.annotate(
+        post_count=Count('posts', filter=Q(posts__status='published'))
+    ).order_by('name')
+    return json_response({
+        'results': [
+            {
+                'id': category.pk,
+                'name': category.name,
+                'slug': category.slug,
+                'description': category.description,
+                'url': reverse('category_posts', args=[category.slug]),
+                'post_count': category.post_count,
+            }
+            for category in categories
+        ],
+    })
@@ -1,6 +1,29 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django_ckeditor_5.apps import DjangoCkeditor5Config
 
 
 class ChebitochConfig(AppConfig):
+    # This module also defines CKEditor5Config, so the bare 'chebitoch' entry needs the marker
+    default = True
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chebitoch'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+class CKEditor5Config(DjangoCkeditor5Config):
+    """django_ckeditor_5 without its image clean-up signals unless a model uses CKEditor5Field.
+
+    The upstream ready() imports them unconditionally, which pulls in Pillow
+    at boot and runs two receivers on every save and delete in the project.
+    """
+
+    def ready(self):
+        uses_field = any(
+            type(field).__module__.startswith('django_ckeditor_5.')
+            for model in apps.get_models()
+            for field in model._meta.fields
+        )
+        if uses_field:
+            super().ready()
@@ -0,0 +1,212 @@
+"""Pre-render ("bake") the public pages to static files.
+
+Every published page is rendered through the WSGI application and written
+under the bake directory with precompressed ``.gz`` (and ``.br`` when the
+``brotli`` package is installed) siblings:
+
+    /post/<slug>/          -> post/<slug>/index.html
+    /sitemap.xml           -> sitemap.xml
+    /?after=<cursor>       -> _q/after=<cursor>/index.html
+
+A manifest records a digest of the database state each page was rendered
+from, so a re-bake only renders pages whose post, comments, category,
+related posts or navigation changed, and deletes pages that disappeared.
+Views are not counted for pages served from the bake directory, and the
+footer trending list is a snapshot taken at bake time.
+
+Serving with nginx (unbaked URLs fall through to Django)::
+
+    map $args $baked_query { "" ""; default /_q/$args; }
+
+    location / {
+        root /srv/baked;
+        gzip_static on;
+        try_files $baked_query$uri $baked_query${uri}index.html @django;
+    }
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Category, Post, RelatedPost
+from .pagination import encode_cursor
+from .views import POSTS_PER_PAGE, SYNTHETIC_REQUEST
+from .wsgi_client import wsgi_request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = 'bake-manifest.json'
+BATCH_SIZE = 50
+
+_SITEMAP_LOC_RE = re.compile(rb'<loc>https?://[^/<]+(/[^<]*)</loc>')
+_CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_application = None
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def output_path(root, url):
+    path, _, query = url.partition('?')
+    name = path.lstrip('/') + ('index.html' if path.endswith('/') else '')
+    if query:
+        return Path(root, '_q', query, name)
+    return Path(root, name)
+
+
+def _cursor_pages(base_url, rows):
+    """Listing URLs for every ``after`` page of newest-first (created_at, pk) rows"""
+    urls = [base_url]
+    for number, index in enumerate(range(POSTS_PER_PAGE - 1, len(rows) - 1, POSTS_PER_PAGE), start=2):
+        created_at, pk = rows[index]
+        urls.append(f'{base_url}?after={encode_cursor(created_at, pk, number)}')
+    return urls
+
+
+def collect_pages():
+    """Map every bakeable URL (except sitemap sections) to a digest of its content's state"""
+    categories = list(Category.objects.order_by('pk').values_list('pk', 'name', 'slug'))
+    navigation = _digest(categories)
+
+    posts = list(
+        Post.objects.filter(status='published').order_by('-created_at', '-pk').annotate(
+            comment_count=Count('comments', filter=Q(comments__active=True)),
+            last_comment=Max('comments__created_at', filter=Q(comments__active=True)),
+        ).values_list(
+            'pk', 'slug', 'category_id', 'created_at', 'updated_at', 'content_version', 'comment_count', 'last_comment',
+        )
+    )
+    related = {}
+    for post_id, related_id in RelatedPost.objects.order_by('post', 'rank').values_list('post', 'related'):
+        related.setdefault(post_id, []).append(related_id)
+
+    pages = {}
+    listing = _digest(navigation, [(row[0], row[4]) for row in posts])
+    for url in _cursor_pages(reverse('home'), [(row[3], row[0]) for row in posts]):
+        pages[url] = listing
+
+    for pk, name, slug in categories:
+        rows = [row for row in posts if row[2] == pk]
+        state = _digest(navigation, [(row[0], row[4]) for row in rows])
+        for url in _cursor_pages(reverse('category_posts', args=[slug]), [(row[3], row[0]) for row in rows]):
+            pages[url] = state
+
+    for pk, slug, _, _, updated_at, content_version, comment_count, last_comment in posts:
+        pages[reverse('post_detail', args=[slug])] = _digest(
+            navigation, updated_at, content_version, comment_count, last_comment, related.get(pk, []),
+        )
+
+    pages[reverse('about')] = navigation
+    pages[reverse('robots')] = ''
+    pages[reverse('django.contrib.sitemaps.views.sitemap')] = listing
+    return pages
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    variants = [(path, content), (path.with_name(path.name + '.gz'), gzip.compress(content, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((path.with_name(path.name + '.br'), brotli.compress(content)))
+    for target, payload in variants:
+        tmp = target.with_name(f'.{target.name}.tmp')
+        tmp.write_bytes(payload)
+        os.replace(tmp, target)
+
+
+def remove_page(root, url):
+    path = output_path(root, url)
+    for target in (path, path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')):
+        target.unlink(missing_ok=True)
+
+
+def bake_batch(root, domain, urls):
+    """Render and write a batch of URLs; returns [(url, status code, sitemap sub-URLs)]"""
+    global _application
+    if _application is None:
+        _application = get_wsgi_application()
+        logging.getLogger('chebitoch.perf').disabled = True
+
+    results = []
+    for url in urls:
+        code, headers, content = wsgi_request(
+            _application, url, HTTP_HOST=domain, HTTP_ACCEPT_ENCODING='identity', **{SYNTHETIC_REQUEST: True}
+        )
+        children = []
+        if code == 200:
+            # Static copies cannot carry a per-visitor CSRF token; the comment form fetches one
+            content = _CSRF_INPUT_RE.sub(rb'\1\2', content)
+            _write(output_path(root, url), content)
+            if url.endswith('.xml'):
+                children = [loc.decode() for loc in _SITEMAP_LOC_RE.findall(content)]
+        results.append((url, code, children))
+    return results
+
+
+def load_manifest(root):
+    try:
+        return json.loads(Path(root, MANIFEST).read_text())
+    except (OSError, ValueError):
+        return {'pages': {}}
+
+
+def bake(root, domain, workers=None, full=False):
+    """Bake changed pages into ``root``; returns a summary dict"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(root)
+    previous = manifest.get('pages', {})
+    pages = collect_pages()
+
+    sitemap_url = reverse('django.contrib.sitemaps.views.sitemap')
+    sitemap_state = pages[sitemap_url]
+    todo = [url for url, state in pages.items() if full or previous.get(url) != state]
+    if sitemap_url not in todo:
+        # Sections are only discovered by rendering the index; keep the ones already baked
+        pages.update((url, state) for url, state in previous.items() if url.startswith('/sitemap-'))
+
+    failed = {}
+    connections.close_all()  # forked workers must not share the parent's DB connections
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {
+            pool.submit(bake_batch, str(root), domain, todo[start:start + BATCH_SIZE])
+            for start in range(0, len(todo), BATCH_SIZE)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for url, code, children in future.result():
+                    if code != 200:
+                        failed[url] = code
+                    new = [child for child in children if child not in pages]
+                    pages.update((child, sitemap_state) for child in new)
+                    if new:
+                        todo.extend(new)
+                        pending.add(pool.submit(bake_batch, str(root), domain, new))
+
+    removed = [url for url in previous if url not in pages or url in failed]
+    for url in removed:
+        remove_page(root, url)
+    for url in failed:
+        pages.pop(url, None)
+
+    manifest = {'baked_at': timezone.now().isoformat(), 'domain': domain, 'pages': pages}
+    tmp = root / f'.{MANIFEST}.tmp'
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, root / MANIFEST)
+    rendered = len(todo) - len(failed)
+    return {'rendered': rendered, 'unchanged': len(pages) - rendered, 'removed': len(removed), 'failed': failed}
@@ -0,0 +1,234 @@
+"""Benchmark harness for the public views.
+
+``seed_corpus`` builds a synthetic, reproducible blog (posts with realistic
+CKEditor-style HTML, categories, comments). ``run_client`` drives a scenario
+through Django's test client and reports latency percentiles, query counts
+and peak Python memory; ``run_load`` hammers the WSGI application from a
+thread pool to measure throughput under concurrency. Used by the
+``bench_seed`` and ``bench`` management commands.
+"""
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .models import Category, Comment, Post
+from .pagination import KeysetPaginator
+from .search import index_post
+from .wsgi_client import wsgi_request
+
+BENCH_AUTHOR = 'bench'
+BENCH_PREFIX = 'bench-'
+
+WORDS = """
+django python cache query index latency throughput render template database
+server worker request response journey startup student developer design
+pattern future idea story travel music game code bug deploy cloud storage
+image search read write learn build ship test review debug profile memory
+""".split()
+
+
+# ===== CORPUS =====
+
+def _sentence(rng, length):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _html_body(rng, paragraphs):
+    parts = []
+    for index in range(paragraphs):
+        if index and index % 4 == 0:
+            parts.append(f'<h2>{_sentence(rng, 4)[:-1]}</h2>')
+        if index % 5 == 2:
+            items = ''.join(f'<li>{_sentence(rng, 6)}</li>' for _ in range(3))
+            parts.append(f'<ul>{items}</ul>')
+        if index % 7 == 3:
+            parts.append(f'<figure class="image"><img src="https://picsum.photos/seed/{rng.randint(1, 10**6)}/1200/630" alt=""></figure>')
+        sentences = ' '.join(_sentence(rng, rng.randint(8, 18)) for _ in range(rng.randint(3, 6)))
+        parts.append(f'<p>{sentences} <a href="https://example.com/{rng.choice(WORDS)}">{rng.choice(WORDS)}</a></p>')
+    return '\n'.join(parts)
+
+
+def clear_corpus():
+    Post.objects.filter(author__username=BENCH_AUTHOR).delete()
+    Category.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+
+
+def seed_corpus(posts=100, categories=10, comments_per_post=5, seed=1, index=True, batch_size=500, log=None):
+    """Create a reproducible synthetic corpus; returns the number of posts created."""
+    rng = random.Random(seed)
+    author, _ = User.objects.get_or_create(username=BENCH_AUTHOR)
+    category_objs = [
+        Category.objects.get_or_create(
+            slug=f'{BENCH_PREFIX}category-{number}',
+            defaults={'name': f'Bench {rng.choice(WORDS).title()} {number}', 'description': _sentence(rng, 12)},
+        )[0]
+        for number in range(categories)
+    ]
+    start = Post.objects.filter(author=author).count()
+
+    for offset in range(0, posts, batch_size):
+        batch = []
+        for number in range(start + offset, start + min(offset + batch_size, posts)):
+            post = Post(
+                title=_sentence(rng, rng.randint(4, 9))[:-1],
+                slug=f'{BENCH_PREFIX}post-{number}',
+                author=author,
+                category=rng.choice(category_objs) if category_objs else None,
+                status='published' if rng.random() < 0.95 else 'draft',
+                content=_html_body(rng, rng.randint(6, 30)),
+                keywords=', '.join(rng.sample(WORDS, 4)),
+            )
+            post.fill_derived_fields()
+            batch.append(post)
+        created = Post.objects.bulk_create(batch)
+
+        Comment.objects.bulk_create(
+            Comment(
+                post=post,
+                name=rng.choice(WORDS).title(),
+                email=f'{rng.choice(WORDS)}@example.com',
+                content=_sentence(rng, rng.randint(5, 40)),
+                active=rng.random() < 0.9,
+            )
+            for post in created
+            for _ in range(rng.randint(0, comments_per_post * 2))
+        )
+        if index:
+            for post in created:
+                index_post(post)
+        if log:
+            log(f'Seeded {offset + len(created)}/{posts} posts')
+    return posts
+
+
+# ===== SCENARIOS =====
+
+@dataclass
+class Scenario:
+    name: str
+    paths: Callable[[random.Random], str]
+
+
+def default_scenarios():
+    published = Post.objects.filter(status='published')
+    slugs = list(published.order_by('-views_count', '-pk').values_list('slug', flat=True)[:500])
+    category_slugs = list(Category.objects.values_list('slug', flat=True))
+    paginator = KeysetPaginator(published, 6)
+    deep_cursor = paginator.cursor_for_page(50)
+
+    scenarios = [
+        Scenario('home', lambda rng: '/'),
+        Scenario('search', lambda rng: f'/search/?q={rng.choice(WORDS)}+{rng.choice(WORDS)}'),
+        Scenario('sitemap', lambda rng: '/sitemap.xml'),
+    ]
+    if deep_cursor:
+        scenarios.append(Scenario('home_page_50', lambda rng: f'/?after={deep_cursor}'))
+    if category_slugs:
+        scenarios.append(Scenario('category_posts', lambda rng: f'/category/{rng.choice(category_slugs)}/'))
+    if slugs:
+        scenarios.append(Scenario('post_detail', lambda rng: f'/post/{rng.choice(slugs)}/'))
+    return scenarios
+
+
+# ===== MEASUREMENT =====
+
+def summarize(latencies, elapsed=None):
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+
+    def pct(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+
+    summary = {
+        'requests': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(len(ordered) / elapsed, 1)
+    return summary
+
+
+def run_client(scenario, iterations=50, warmup=5, cold=False, seed=1):
+    """Sequential run through the test client: latency, queries, peak memory."""
+    rng = random.Random(seed)
+    client = Client()
+    for _ in range(warmup):
+        client.get(scenario.paths(rng), secure=True)
+
+    latencies, query_counts, statuses = [], [], {}
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        path = scenario.paths(rng)
+        with CaptureQueriesContext(connection) as queries:
+            begin = time.perf_counter()
+            response = client.get(path, secure=True)
+            latencies.append(time.perf_counter() - begin)
+        query_counts.append(len(queries))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = summarize(latencies, elapsed)
+    result.update({
+        'queries_mean': round(statistics.fmean(query_counts), 2),
+        'queries_max': max(query_counts),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'statuses': statuses,
+    })
+    return result
+
+
+def wsgi_get(application, path):
+    """Issue one GET through the WSGI app; returns (status code, body size)."""
+    code, _, content = wsgi_request(application, path)
+    return code, len(content)
+
+
+def run_load(scenario, requests=500, concurrency=8, seed=1, application=None):
+    """Concurrent in-process load: throughput and latency under contention."""
+    application = application or get_wsgi_application()
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+
+    def worker(number):
+        if not hasattr(local, 'rng'):
+            local.rng = random.Random(seed * 1000 + number)
+        path = scenario.paths(local.rng)
+        begin = time.perf_counter()
+        code, _ = wsgi_get(application, path)
+        elapsed = time.perf_counter() - begin
+        with lock:
+            latencies.append(elapsed)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed)
+    result.update({'concurrency': concurrency, 'statuses': statuses})
+    return result
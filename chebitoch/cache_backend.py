@@ -0,0 +1,58 @@
+import uuid
+
+from django.conf import settings
+
+# A claimed batch not released within this long is assumed orphaned by a dead worker
+BATCH_LEASE_SECONDS = 600
+
+
+def uses_redis():
+    """True when the default cache is served by django_redis."""
+    return settings.CACHES['default']['BACKEND'].startswith('django_redis')
+
+
+def get_redis():
+    """Raw redis client behind the default cache, or None on other backends."""
+    if not uses_redis():
+        return None
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def claim_batches(client, key, label):
+    """Move the Redis buffer at ``key`` aside, plus any batches orphaned by dead workers.
+
+    Returns the names of the claimed batches (``<key>:<label>:<id>``). Each
+    carries a lease while it is processed; call ``release_batches`` once its
+    data is committed. A batch whose lease runs out is claimed again by the
+    next caller, so a worker dying mid-way loses nothing.
+    """
+    from redis.exceptions import ResponseError
+
+    prefix = f'{key}:{label}:'
+    sources = [
+        name for name in (raw.decode() for raw in client.scan_iter(match=f'{prefix}*'))
+        if not name.endswith(':lease') and not client.exists(f'{name}:lease')
+    ]
+    claimed = []
+    for source in [*sources, key]:
+        batch = f'{prefix}{uuid.uuid4().hex}'
+        # Lease first, so the batch never exists unleased
+        client.set(f'{batch}:lease', 1, ex=BATCH_LEASE_SECONDS)
+        try:
+            # RENAME is atomic: new entries land in a fresh buffer, and racing claimers get one winner
+            client.rename(source, batch)
+        except ResponseError:
+            client.delete(f'{batch}:lease')
+            continue
+        claimed.append(batch)
+    return claimed
+
+
+def release_batches(client, batches, processed=True):
+    """Delete processed batches; unprocessed ones just drop their lease and are retried"""
+    names = [f'{batch}:lease' for batch in batches]
+    if processed:
+        names.extend(batches)
+    if names:
+        client.delete(*names)
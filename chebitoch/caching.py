@@ -0,0 +1,82 @@
+"""Cached computations with stampede protection.
+
+``cached_computation`` stores a value together with how long it took to
+compute, refreshes it probabilistically shortly before expiry (XFetch) so
+hot keys rarely expire under load, lets only one caller recompute at a time
+(Redis lock on django_redis, a thread lock otherwise), and embeds generation
+counters in the key so signals can invalidate it.
+"""
+import math
+import random
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from .cache_backend import uses_redis
+from .generations import get_generations
+from .metrics import record_cache
+
+# Only locks some caller still holds or waits on stay in here
+_local_locks = weakref.WeakValueDictionary()
+_local_locks_guard = threading.Lock()
+
+
+@contextmanager
+def single_flight(key, blocking=True, timeout=30):
+    """Yield True if this caller holds the recompute lock for ``key``."""
+    if uses_redis():
+        lock = cache.lock(f'lock:{key}', timeout=timeout)
+        acquired = lock.acquire(blocking=blocking, blocking_timeout=timeout if blocking else None)
+    else:
+        with _local_locks_guard:
+            lock = _local_locks.setdefault(key, threading.Lock())
+        acquired = lock.acquire(blocking, timeout if blocking else -1)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except Exception:
+                # The Redis lock may already have expired
+                pass
+
+
+def _store(key, compute, timeout):
+    started = time.monotonic()
+    value = compute()
+    elapsed = time.monotonic() - started
+    cache.set(key, (value, elapsed, time.time() + timeout), timeout)
+    return value
+
+
+def cached_computation(key, compute, timeout=300, generations=(), beta=1.0, lock_timeout=30):
+    """Return ``compute()``, cached under ``key`` for up to ``timeout`` seconds.
+
+    ``generations`` names counters from chebitoch.generations; bumping any of
+    them invalidates the cached value.
+    """
+    if generations:
+        key = ':'.join([key, *map(str, get_generations(*generations))])
+
+    entry = cache.get(key)
+    record_cache(entry is not None)
+    if entry is not None:
+        value, elapsed, expires_at = entry
+        # XFetch: the closer to expiry and the costlier the value, the likelier an early refresh
+        if time.time() - elapsed * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+        with single_flight(key, blocking=False, timeout=lock_timeout) as acquired:
+            if acquired:
+                return _store(key, compute, timeout)
+        return value
+
+    with single_flight(key, timeout=lock_timeout):
+        # Another worker may have filled it while we waited for the lock
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        return _store(key, compute, timeout)
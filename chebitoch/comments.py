@@ -0,0 +1,213 @@
+"""Comment ingestion and reading.
+
+The submit endpoint only validates and inserts one CommentSubmission row, so
+its cost does not depend on the size of the thread. The process_comments
+worker drains the outbox in batches, bulk-inserting pending (inactive)
+Comments; nothing public changes until a moderator approves them.
+
+Approved comments are read a page at a time, oldest first, with a keyset
+on (created_at, id). The first page and the count are cached per post
+under the comments:<post_id> generation.
+
+Moderators approve in chunks (``approve_comments``), invalidating each
+chunk's posts as it goes. Large selections are queued as CommentApproval
+rows (the pending ids, one chunk per row) and applied by the same
+process_comments worker.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector, SearchVectorExact
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import cached_computation
+from .models import Comment, CommentApproval, CommentSubmission
+from .pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 5000
+APPROVE_CHUNK_SIZE = 500
+# A claimed approval not finished after this long is assumed abandoned by a dead worker
+APPROVAL_CLAIM_TIMEOUT = timedelta(hours=1)
+
+
+def clean_submission(data):
+    """Return (cleaned fields, error message or None) for a submitted comment"""
+    cleaned = {field: data.get(field, '').strip() for field in ('name', 'email', 'content')}
+    if not all(cleaned.values()):
+        return cleaned, 'Please fill in all fields.'
+    if len(cleaned['name']) > Comment._meta.get_field('name').max_length:
+        return cleaned, 'Please use a shorter name.'
+    if len(cleaned['content']) > MAX_CONTENT_LENGTH:
+        return cleaned, f'Comments are limited to {MAX_CONTENT_LENGTH} characters.'
+    try:
+        validate_email(cleaned['email'])
+    except ValidationError:
+        return cleaned, 'Please enter a valid email address.'
+    return cleaned, None
+
+
+def enqueue_comment(post_id, cleaned):
+    return CommentSubmission.objects.create(post_id=post_id, **cleaned)
+
+
+def process_submissions(batch_size=200):
+    """Move one batch of pending submissions into Comment; returns how many were processed"""
+    with transaction.atomic():
+        pending = CommentSubmission.objects.filter(processed_at__isnull=True).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Lets several workers drain the outbox without double-inserting
+            pending = pending.select_for_update(skip_locked=True)
+        batch = list(pending[:batch_size])
+        if not batch:
+            return 0
+
+        Comment.objects.bulk_create([
+            Comment(post_id=item.post_id, name=item.name, email=item.email, content=item.content)
+            for item in batch
+        ])
+        CommentSubmission.objects.filter(pk__in=[item.pk for item in batch]).update(
+            processed_at=timezone.now()
+        )
+    return len(batch)
+
+
+def purge_processed(older_than):
+    return CommentSubmission.objects.filter(processed_at__lt=older_than).delete()[0]
+
+
+def approve_comments(queryset, chunk_size=APPROVE_CHUNK_SIZE):
+    """Activate the pending comments in ``queryset`` a chunk at a time; returns how many were approved.
+
+    Each chunk is its own short UPDATE, and its posts' cached comment lists
+    and pages are invalidated before the next one, so a huge selection
+    never holds long locks and readers see approvals as they land.
+    """
+    from .signals import invalidate_post_comments
+
+    pending = queryset.filter(active=False).order_by('pk').values_list('pk', 'post_id')
+    approved, last_pk = 0, 0
+    while True:
+        chunk = list(pending.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            return approved
+        last_pk = chunk[-1][0]
+        with transaction.atomic():
+            approved += Comment.objects.filter(pk__in=[pk for pk, _ in chunk], active=False).update(active=True)
+        invalidate_post_comments({post_id for _, post_id in chunk})
+
+
+def request_approval(queryset, user=None, chunk_size=APPROVE_CHUNK_SIZE):
+    """Queue the pending comments in ``queryset`` for the process_comments worker; returns how many"""
+    pending = queryset.filter(active=False).order_by('pk').values_list('pk', flat=True)
+    queued, last_pk = 0, 0
+    while True:
+        ids = list(pending.filter(pk__gt=last_pk)[:chunk_size * 20])
+        if not ids:
+            return queued
+        last_pk = ids[-1]
+        CommentApproval.objects.bulk_create([
+            CommentApproval(comment_ids=ids[start:start + chunk_size], requested_by=user)
+            for start in range(0, len(ids), chunk_size)
+        ])
+        queued += len(ids)
+
+
+def process_approvals():
+    """Claim and apply the oldest queued approval; returns it, or None when the queue is empty.
+
+    A failed approval keeps its claim and ``error`` and is retried after
+    APPROVAL_CLAIM_TIMEOUT; only a successful one gets ``processed_at``.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        pending = CommentApproval.objects.filter(processed_at__isnull=True).filter(
+            Q(started_at__isnull=True) | Q(started_at__lt=now - APPROVAL_CLAIM_TIMEOUT)
+        ).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+        approval = pending.first()
+        if approval is None:
+            return None
+        approval.started_at = now
+        approval.save(update_fields=['started_at'])
+
+    # Approving is idempotent, so a reclaimed request just finishes the remainder
+    try:
+        approval.approved = approve_comments(Comment.objects.filter(pk__in=approval.comment_ids))
+    except Exception as exc:
+        # Left claimed, so it is retried once the claim times out
+        logger.exception('Could not apply comment approval %s', approval.pk)
+        approval.error = f'{type(exc).__name__}: {exc}'
+        approval.save(update_fields=['error'])
+        return approval
+    approval.processed_at = timezone.now()
+    approval.error = ''
+    approval.save(update_fields=['approved', 'processed_at', 'error'])
+    return approval
+
+
+def content_search(term):
+    """Filter for comments whose text matches ``term``.
+
+    On PostgreSQL this is a full-text match served by the GIN index from
+    migration 0014; other backends fall back to a LIKE scan.
+    """
+    if connection.vendor != 'postgresql':
+        return Q(content__icontains=term)
+    return SearchVectorExact(
+        SearchVector('content', config='simple'), SearchQuery(term, config='simple', search_type='websearch')
+    )
+
+
+def inline_comments():
+    return getattr(settings, 'COMMENTS_INLINE', 10)
+
+
+def comments_page_size():
+    return getattr(settings, 'COMMENTS_PAGE_SIZE', 20)
+
+
+def comment_page(post_id, after=None, limit=None):
+    """(comments, next cursor or None) of a post's approved comments after ``after``.
+
+    Raises pagination.InvalidCursor for a malformed cursor.
+    """
+    limit = limit or comments_page_size()
+    comments = Comment.objects.filter(post_id=post_id, active=True).only(
+        'name', 'content', 'created_at'
+    ).order_by('created_at', 'id')
+    number = 1
+    if after:
+        created_at, pk, number = decode_cursor(after)
+        number += 1
+        comments = comments.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+    rows = list(comments[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk, number)
+    return rows, next_cursor
+
+
+def first_comments_cached(post_id):
+    """The comments rendered inline on the post page, plus the cursor for the rest"""
+    return cached_computation(
+        f'comments:{post_id}:first', lambda: comment_page(post_id, limit=inline_comments()),
+        3600, generations=[f'comments:{post_id}'],
+    )
+
+
+def comment_count_cached(post_id):
+    return cached_computation(
+        f'comments:{post_id}:count',
+        lambda: Comment.objects.filter(post_id=post_id, active=True).count(),
+        3600, generations=[f'comments:{post_id}'],
+    )
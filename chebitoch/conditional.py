@@ -0,0 +1,59 @@
+"""Conditional GET (ETag / Last-Modified / 304) for the public views.
+
+Validators are computed from cheap aggregate queries and cache generations
+before the view runs, so a matching request is answered without touching the
+ORM-heavy view body or the template engine.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .generations import get_generations
+from .page_cache import SITE_TAG, is_cacheable_request
+
+
+def make_etag(last_modified, *tags, extra=''):
+    """Strong ETag over a timestamp, the generations of ``tags`` and ``extra``
+    (state shown on the page that has no generation, e.g. the trending list)."""
+    generations = get_generations(SITE_TAG, *tags)
+    raw = '|'.join([last_modified.isoformat() if last_modified else '', *tags, *map(str, generations), extra])
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def conditional_page(state, on_not_modified=None):
+    """Answer If-None-Match / If-Modified-Since before running the view.
+
+    ``state(request, **kwargs)`` returns ``(last_modified, etag, extras)`` or
+    None (e.g. for a missing object, so the view can 404). ``extras`` is
+    passed to ``on_not_modified(request, extras)`` when a 304 is sent.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Pages carrying flash messages or a session are personal; always render them
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            current = state(request, **kwargs)
+            if current is None:
+                return view(request, *args, **kwargs)
+
+            last_modified, etag, extras = current
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is not None:
+                if on_not_modified is not None and response.status_code == 304:
+                    on_not_modified(request, extras)
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                if etag and not response.has_header('ETag'):
+                    response['ETag'] = etag
+                if timestamp and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
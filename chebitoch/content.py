@@ -0,0 +1,167 @@
+"""Render CKEditor post bodies into the HTML served on post pages.
+
+``render_content`` runs once per save (and from the rerender_content
+command), never per request. It parses the body with html.parser and:
+
+- keeps only an allowlist of CKEditor 5 tags and attributes, dropping
+  scripts, event handlers and javascript:/data: URLs;
+- adds loading="lazy" and decoding="async" to images;
+- adds rel="noopener noreferrer" to links opening a new tab;
+- gives h2-h4 headings unique slug ids and collects them into a table
+  of contents.
+
+Bump CONTENT_VERSION whenever the output changes so rerender_content
+picks up every stored post.
+"""
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.utils.text import slugify
+
+CONTENT_VERSION = 1
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'del', 'div', 'em', 'figcaption', 'figure',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'mark', 'ol', 'p', 'pre',
+    's', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead',
+    'tr', 'u', 'ul', 'oembed',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them
+SKIP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'svg', 'math'}
+GLOBAL_ATTRIBUTES = {'class', 'style', 'title', 'lang', 'dir'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'target', 'rel', 'name'},
+    'img': {'src', 'alt', 'width', 'height', 'srcset', 'sizes'},
+    'ol': {'start', 'reversed', 'type'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    'oembed': {'url'},
+}
+URL_ATTRIBUTES = {'href', 'src', 'url'}
+SAFE_SCHEMES = {'', 'http', 'https', 'mailto', 'tel'}
+TOC_LEVELS = {'h2', 'h3', 'h4'}
+# Elements whose start implicitly ends an open sibling, as browsers parse them
+IMPLICIT_END = {'li': {'li'}, 'p': {'p'}, 'td': {'td', 'th'}, 'th': {'td', 'th'}, 'tr': {'tr', 'td', 'th'}}
+
+
+def _safe_url(value):
+    scheme = urlsplit(value.strip().replace('\x00', '')).scheme.lower()
+    return scheme in SAFE_SCHEMES
+
+
+def _safe_style(value):
+    lowered = value.lower().replace(' ', '')
+    return not any(token in lowered for token in ('url(', 'expression(', 'javascript:', '@import'))
+
+
+class ContentRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.skip_depth = 0
+        self.toc = []
+        self.used_ids = set()
+        self.heading = None  # (tag, index of its start tag in out, text parts)
+
+    def _attributes(self, tag, attrs):
+        allowed = GLOBAL_ATTRIBUTES | ALLOWED_ATTRIBUTES.get(tag, set())
+        cleaned = {}
+        for name, value in attrs:
+            name = name.lower()
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _safe_url(value):
+                continue
+            if name == 'srcset' and not all(_safe_url(part.split()[0]) for part in value.split(',') if part.strip()):
+                continue
+            if name == 'style' and not _safe_style(value):
+                continue
+            cleaned[name] = value
+
+        if tag == 'img':
+            cleaned.setdefault('loading', 'lazy')
+            cleaned.setdefault('decoding', 'async')
+        elif tag == 'a' and cleaned.get('target') == '_blank':
+            cleaned['rel'] = 'noopener noreferrer'
+        return cleaned
+
+    def _start_tag(self, tag, attributes, close=False):
+        rendered = ''.join(f' {name}="{escape(value)}"' for name, value in attributes.items())
+        return f'<{tag}{rendered}{" /" if close else ""}>'
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_depth or tag in SKIP_CONTENT_TAGS:
+            self.skip_depth += tag not in VOID_TAGS
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attributes = self._attributes(tag, attrs)
+        if tag == 'img' and 'src' not in attributes:
+            return
+        while self.open_tags and self.open_tags[-1] in IMPLICIT_END.get(tag, ()):
+            self.handle_endtag(self.open_tags[-1])
+        if tag in TOC_LEVELS and self.heading is None:
+            self.heading = (tag, len(self.out), [])
+            self.out.append(attributes)  # rendered once the heading text is known
+        else:
+            self.out.append(self._start_tag(tag, attributes))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.skip_depth:
+            self.skip_depth -= tag not in VOID_TAGS
+            return
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside this element
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.out.append(f'</{current}>')
+            if self.heading and current == self.heading[0]:
+                self._finish_heading()
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.heading:
+            self.heading[2].append(data)
+        self.out.append(escape(data, quote=False))
+
+    def _finish_heading(self):
+        tag, index, parts = self.heading
+        self.heading = None
+        attributes = self.out[index]
+        title = ' '.join(''.join(parts).split())
+        base = slugify(title) or 'section'
+        anchor, number = base, 2
+        while anchor in self.used_ids:
+            anchor, number = f'{base}-{number}', number + 1
+        self.used_ids.add(anchor)
+        attributes['id'] = anchor
+        self.out[index] = self._start_tag(tag, attributes)
+        if title:
+            self.toc.append({'level': int(tag[1]), 'id': anchor, 'title': title})
+
+    def render(self, html):
+        self.feed(html or '')
+        self.close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+        return ''.join(self.out), self.toc
+
+
+def render_content(html):
+    """Return (sanitized HTML, table of contents) for a post body"""
+    return ContentRenderer().render(html)
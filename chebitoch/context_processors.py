@@ -0,0 +1,8 @@
+from django.utils.functional import SimpleLazyObject
+
+from .trending import trending_posts
+
+
+def trending(request):
+    """Top trending posts for base.html, only loaded if a template uses them"""
+    return {'trending_posts': SimpleLazyObject(lambda: trending_posts(5))}
@@ -0,0 +1,132 @@
+"""Write-behind view counter.
+
+Hits are buffered in the cache backend (a Redis hash on django_redis, a
+process-local dict otherwise) and folded into Post.views_count with batched
+F() updates, so post_detail never waits on a row write.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .cache_backend import claim_batches, get_redis, release_batches
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'views:pending'
+FLUSH_LOCK_KEY = 'views:flush-lock'
+BATCH_SIZE = 500
+
+_local_buffer = defaultdict(int)
+_local_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def flush_interval():
+    return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 30)
+
+
+def record_view(post_id):
+    """Count one hit for a post without touching the database."""
+    client = get_redis()
+    if client is not None:
+        client.hincrby(cache.make_key(PENDING_KEY), post_id, 1)
+    else:
+        with _local_lock:
+            _local_buffer[post_id] += 1
+    _maybe_flush(client)
+
+
+def _maybe_flush(client):
+    global _last_flush
+    now = time.monotonic()
+    if now - _last_flush < flush_interval():
+        return
+    with _local_lock:
+        if now - _last_flush < flush_interval():
+            return
+        _last_flush = now
+    # With Redis the buffer is shared, so only one worker per interval flushes it
+    if client is not None and not cache.add(FLUSH_LOCK_KEY, 1, flush_interval()):
+        return
+    threading.Thread(target=_flush_in_background, daemon=True).start()
+
+
+def _flush_in_background():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Failed to flush buffered view counts')
+    finally:
+        connection.close()
+
+
+def flush_views():
+    """Apply buffered hits to Post.views_count. Returns the number of posts updated.
+
+    Redis batches are only deleted after the update commits; a flush that
+    fails or dies leaves them to be applied by the next one.
+    """
+    client = get_redis()
+    if client is None:
+        return _flush_local()
+
+    batches = claim_batches(client, cache.make_key(PENDING_KEY), 'flushing')
+    pending = Counter()
+    for batch in batches:
+        for post_id, hits in client.hgetall(batch).items():
+            pending[int(post_id)] += int(hits)
+    try:
+        with transaction.atomic():
+            _apply(pending)
+            transaction.on_commit(lambda: release_batches(client, batches))
+    except Exception:
+        release_batches(client, batches, processed=False)
+        raise
+    return len(pending)
+
+
+def _flush_local():
+    with _local_lock:
+        pending = dict(_local_buffer)
+        _local_buffer.clear()
+    if not pending:
+        return 0
+    try:
+        _apply(pending)
+    except Exception:
+        with _local_lock:
+            for post_id, hits in pending.items():
+                _local_buffer[post_id] += hits
+        raise
+    return len(pending)
+
+
+def _apply(pending):
+    # One UPDATE per distinct delta keeps the statement count small
+    by_delta = defaultdict(list)
+    for post_id, hits in pending.items():
+        by_delta[hits].append(post_id)
+
+    with transaction.atomic():
+        for hits, post_ids in by_delta.items():
+            for start in range(0, len(post_ids), BATCH_SIZE):
+                Post.objects.filter(pk__in=post_ids[start:start + BATCH_SIZE]).update(
+                    views_count=F('views_count') + hits
+                )
+
+
+@atexit.register
+def _flush_on_exit():
+    if get_redis() is None and _local_buffer:
+        try:
+            flush_views()
+        except Exception:
+            logger.exception('Failed to flush buffered view counts on exit')
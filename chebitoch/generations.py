@@ -0,0 +1,43 @@
+"""Generation counters for cache invalidation.
+
+Cache keys embed the current generation of everything they depend on, so
+bumping a generation orphans every entry built from the old value without
+having to know the keys themselves.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _key(name):
+    return f'gen:{name}'
+
+
+def _fresh_value():
+    # Time-based so an evicted counter never restarts at a value already used
+    return time.time_ns() // 1000
+
+
+def get_generations(*names):
+    """Current generation for each name, as a list in the same order."""
+    keys = [_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: _fresh_value() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, None):
+            found[key] = cache.get(key, value)
+        else:
+            found[key] = value
+    return [found[key] for key in keys]
+
+
+def get_generation(name):
+    return get_generations(name)[0]
+
+
+def bump_generation(*names):
+    for name in set(names):
+        try:
+            cache.incr(_key(name))
+        except ValueError:
+            cache.set(_key(name), _fresh_value(), None)
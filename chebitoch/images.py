@@ -0,0 +1,192 @@
+"""Resized JPEG/WebP (and AVIF, where Pillow supports it) variants of featured images.
+
+The original is fetched once, stored through the default storage next to
+its derivatives under images/<digest>/, and the variant URLs and sizes are
+recorded on Post.image_variants:
+
+    {'source': <featured_image>, 'width': w, 'height': h,
+     'variants': {'jpeg': [{'width', 'height', 'url'}, ...], 'webp': [...]}}
+
+Encoding is CPU-bound and runs in a process pool from the
+build_image_variants command; single posts are handled in a background
+thread when they are saved with a new image. This module is imported by
+the signal handlers at boot, so Pillow, urllib.request and the process
+pool are only imported when an image is actually processed.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+QUALITY = {'jpeg': 82, 'webp': 80, 'avif': 60}
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp', 'avif': 'avif'}
+
+
+def variant_widths():
+    return getattr(settings, 'IMAGE_VARIANT_WIDTHS', (320, 640, 960, 1280, 1920))
+
+
+def variant_formats():
+    from PIL import features
+
+    formats = ['jpeg', 'webp']
+    if features.check('avif'):
+        formats.append('avif')
+    return formats
+
+
+def fetch_source(url):
+    """Bytes of the original image, read from our own storage when it lives there"""
+    media_url = settings.MEDIA_URL
+    if url.startswith(media_url):
+        with default_storage.open(url[len(media_url):]) as fh:
+            return fh.read()
+
+    import urllib.request
+
+    request = urllib.request.Request(url, headers={'User-Agent': 'chebitoch-images/1.0'})
+    with urllib.request.urlopen(request, timeout=20) as response:
+        data = response.read(MAX_SOURCE_BYTES + 1)
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ValueError(f'{url} is larger than {MAX_SOURCE_BYTES} bytes')
+    return data
+
+
+def render_variants(data, widths, formats):
+    """Encode the variants of one image; runs in worker processes, so no Django access.
+
+    Returns (width, height, [(format, width, height, bytes), ...]).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        width, height = image.size
+        # Never upscale; an image narrower than every step gets one variant at its own width
+        steps = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+
+        rendered = []
+        for step in steps:
+            resized = image.resize((step, round(height * step / width)), Image.LANCZOS) if step < width else image
+            for fmt in formats:
+                out = io.BytesIO()
+                frame = resized.convert('RGB') if fmt == 'jpeg' else resized
+                options = {'quality': QUALITY[fmt]}
+                if fmt == 'jpeg':
+                    options.update(optimize=True, progressive=True)
+                elif fmt == 'webp':
+                    options['method'] = 6
+                frame.save(out, format=fmt.upper(), **options)
+                rendered.append((fmt, resized.width, resized.height, out.getvalue()))
+    return width, height, rendered
+
+
+def _store(name, data):
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return default_storage.url(name)
+
+
+def store_variants(url, data, rendered):
+    """Save the original and its renditions; returns the Post.image_variants value"""
+    width, height, renditions = rendered
+    folder = f'images/{hashlib.sha1(url.encode()).hexdigest()[:16]}'
+    extension = os.path.splitext(urlsplit(url).path)[1].lower()
+    import mimetypes
+
+    if not mimetypes.types_map.get(extension, '').startswith('image/'):
+        extension = '.img'
+    _store(f'{folder}/original{extension}', data)
+
+    variants = {}
+    for fmt, w, h, payload in renditions:
+        variants.setdefault(fmt, []).append({
+            'width': w, 'height': h, 'url': _store(f'{folder}/{w}.{EXTENSIONS[fmt]}', payload),
+        })
+    return {'source': url, 'width': width, 'height': height, 'variants': variants}
+
+
+def _save_variants(post_id, url, value):
+    post = Post.objects.filter(pk=post_id, featured_image=url).first()
+    if post is None:
+        return False  # the image changed while we were encoding
+    post.image_variants = value
+    # Goes through save() so the post's cached pages are invalidated
+    post.save(update_fields=['image_variants'])
+    return True
+
+
+def needs_variants(post):
+    return bool(post.featured_image) and (post.image_variants or {}).get('source') != post.featured_image
+
+
+def process_post(post):
+    url = post.featured_image
+    data = fetch_source(url)
+    value = store_variants(url, data, render_variants(data, variant_widths(), variant_formats()))
+    return _save_variants(post.pk, url, value)
+
+
+def process_posts(posts, workers=None, chunk_size=None):
+    """Build variants for many posts, encoding in a process pool; returns (done, failed)
+
+    Sources are fetched and encoded ``chunk_size`` posts at a time (default:
+    two per worker), so only one chunk of images is held in memory.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or workers * 2
+    widths, formats = variant_widths(), variant_formats()
+    posts = iter(posts)
+    done = total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while chunk := list(islice(posts, chunk_size)):
+            total += len(chunk)
+            futures = []
+            for post in chunk:
+                try:
+                    data = fetch_source(post.featured_image)
+                except Exception:
+                    logger.exception('Could not fetch featured image of post %s', post.pk)
+                    continue
+                futures.append((post, data, pool.submit(render_variants, data, widths, formats)))
+            for post, data, future in futures:
+                try:
+                    value = store_variants(post.featured_image, data, future.result())
+                except Exception:
+                    logger.exception('Could not build image variants of post %s', post.pk)
+                    continue
+                done += _save_variants(post.pk, post.featured_image, value)
+    return done, total - done
+
+
+def schedule_post_variants(post):
+    """Build a saved post's variants off the request thread"""
+    if not getattr(settings, 'IMAGE_VARIANTS_ON_SAVE', True) or not needs_variants(post):
+        return
+
+    def run():
+        try:
+            process_post(post)
+        except Exception:
+            logger.exception('Could not build image variants of post %s', post.pk)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name=f'image-variants-{post.pk}', daemon=True).start()
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chebitoch.bake import bake
+
+
+class Command(BaseCommand):
+    help = "Pre-render published pages to static HTML (with .gz/.br siblings), re-rendering only what changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default=getattr(settings, 'BAKE_ROOT', None),
+                            help='Directory to write to (default: BAKE_ROOT)')
+        parser.add_argument('--domain', default=getattr(settings, 'SITEMAP_DOMAIN', None),
+                            help='Host the pages are rendered for (default: SITEMAP_DOMAIN)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Render processes (default: one per CPU)')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-render every page, e.g. after a template change')
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError('Give an output directory or set BAKE_ROOT.')
+        if not options['domain']:
+            raise CommandError('Give --domain or set SITEMAP_DOMAIN.')
+
+        summary = bake(options['output'], options['domain'], options['workers'], full=options['all'])
+        for url, code in sorted(summary['failed'].items()):
+            self.stderr.write(f"{url}: HTTP {code}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Baked {summary['rendered']} page(s), {summary['unchanged']} unchanged, "
+            f"{summary['removed']} removed, {len(summary['failed'])} failed"
+        ))
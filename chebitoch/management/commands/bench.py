@@ -0,0 +1,94 @@
+import json
+import logging
+import platform
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+
+from chebitoch.bench import default_scenarios, run_client, run_load
+from chebitoch.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Benchmark the public views (sequential client run plus concurrent WSGI load)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', help="Comma-separated scenario names (default: all)")
+        parser.add_argument('--iterations', type=int, default=50, help="Sequential requests per scenario")
+        parser.add_argument('--requests', type=int, default=500, help="Concurrent-load requests per scenario (0 to skip)")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--cold', action='store_true', help="Clear the cache before every sequential request")
+        parser.add_argument('--output', help="Write results as JSON to this path")
+        parser.add_argument('--compare', help="Print p50/p95 deltas against an earlier JSON result")
+
+    def handle(self, *args, **options):
+        # Built first: django.setup() inside it re-applies LOGGING
+        application = get_wsgi_application()
+        # Per-request perf log lines would drown the report
+        if options['verbosity'] < 2:
+            logging.getLogger('chebitoch.perf').setLevel(logging.WARNING)
+
+        scenarios = default_scenarios()
+        if options['scenarios']:
+            wanted = set(options['scenarios'].split(','))
+            unknown = wanted - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+        results = {}
+        for scenario in scenarios:
+            result = {'client': run_client(scenario, options['iterations'], cold=options['cold'])}
+            if options['requests']:
+                result['load'] = run_load(
+                    scenario, options['requests'], options['concurrency'], application=application
+                )
+            results[scenario.name] = result
+            self._report(scenario.name, result)
+
+        payload = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+                'posts': Post.objects.count(),
+                'comments': Comment.objects.count(),
+                'options': {key: options[key] for key in ('iterations', 'requests', 'concurrency', 'cold')},
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(payload, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+        if options['compare']:
+            self._compare(options['compare'], results)
+
+    def _report(self, name, result):
+        client = result['client']
+        line = (
+            f"{name:<16} p50 {client['p50_ms']:>8.2f}ms  p95 {client['p95_ms']:>8.2f}ms  "
+            f"p99 {client['p99_ms']:>8.2f}ms  queries {client['queries_mean']:>5}  "
+            f"peak {client['peak_memory_kb']:>8.1f}KB"
+        )
+        if 'load' in result:
+            load = result['load']
+            line += f"  |  {load['throughput_rps']:>7.1f} req/s @{load['concurrency']}  p95 {load['p95_ms']:.2f}ms"
+        self.stdout.write(line)
+
+    def _compare(self, path, results):
+        with open(path) as f:
+            baseline = json.load(f)['results']
+        self.stdout.write(f"\nCompared with {path}:")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            for metric in ('p50_ms', 'p95_ms'):
+                before = baseline[name]['client'][metric]
+                after = result['client'][metric]
+                change = (after - before) / before * 100 if before else 0.0
+                self.stdout.write(f"  {name:<16} {metric}: {before:.2f} -> {after:.2f} ({change:+.1f}%)")
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chebitoch.bench import clear_corpus, seed_corpus
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic benchmark corpus (posts, categories, comments)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--comments', type=int, default=5, help="Average comments per post")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--clear', action='store_true', help="Delete the existing benchmark corpus first")
+        parser.add_argument('--no-index', action='store_true', help="Skip building search documents")
+        parser.add_argument('--force', action='store_true', help="Allow seeding when DEBUG is off")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError("Refusing to seed benchmark data with DEBUG off; pass --force if you mean it")
+
+        if options['clear']:
+            clear_corpus()
+            self.stdout.write("Cleared existing benchmark corpus")
+
+        seeded = seed_corpus(
+            posts=options['posts'],
+            categories=options['categories'],
+            comments_per_post=options['comments'],
+            seed=options['seed'],
+            index=not options['no_index'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Seeded {seeded} benchmark post(s)"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from chebitoch.images import needs_variants, process_posts
+from chebitoch.models import Post
+
+
+class Command(BaseCommand):
+    help = "Build resized JPEG/WebP/AVIF variants of post featured images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Rebuild every post, not only those whose image changed')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Encoder processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(featured_image__isnull=True).exclude(featured_image='').only(
+            'featured_image', 'image_variants'
+        ).iterator(chunk_size=200)
+        if not options['all']:
+            posts = (post for post in posts if needs_variants(post))
+
+        done, failed = process_posts(posts, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"Built image variants for {done} post(s), {failed} failed"))
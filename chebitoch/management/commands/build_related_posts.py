@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from chebitoch.related import build_related_index, index_built
+
+
+class Command(BaseCommand):
+    help = "Recompute TF-IDF vectors and related-post lists for all published posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help="Only build if no index has been built yet",
+        )
+
+    def handle(self, *args, **options):
+        if options['missing'] and index_built():
+            self.stdout.write("Related posts index already built")
+            return
+        total = build_related_index(log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Built related posts for {total} post(s)"))
@@ -0,0 +1,52 @@
+import gzip
+import io
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from chebitoch.sitemaps import (
+    prebuilt_path, sitemap_root, sitemap_state, sitemaps, state_path, write_index, write_section_page,
+)
+
+
+class Command(BaseCommand):
+    help = "Pre-render the sitemap index and every section page to gzip files in SITEMAP_ROOT"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain', default=getattr(settings, 'SITEMAP_DOMAIN', None),
+            help="Host name used in sitemap URLs (defaults to SITEMAP_DOMAIN)",
+        )
+
+    def handle(self, *args, **options):
+        domain = options['domain']
+        if not domain:
+            raise CommandError("Pass --domain or set SITEMAP_DOMAIN")
+
+        os.makedirs(sitemap_root(), exist_ok=True)
+        # Taken before rendering, so edits made during the build make the files stale
+        state = sitemap_state()
+        section_urls = []
+        for section, sitemap_class in sitemaps.items():
+            sitemap = sitemap_class()
+            base_url = f"{sitemap.protocol}://{domain}{reverse('sitemap_section', args=[section])}"
+            for page in sitemap.paginator.page_range:
+                self._write(prebuilt_path(section, page), write_section_page, sitemap, page, domain)
+                section_urls.append(base_url if page == 1 else f'{base_url}?p={page}')
+            self.stdout.write(f"{section}: {sitemap.paginator.num_pages} page(s)")
+
+        self._write(prebuilt_path(), write_index, section_urls)
+        tmp_path = f'{state_path()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(state)
+        os.replace(tmp_path, state_path())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(section_urls)} sitemap section(s) to {sitemap_root()}"))
+
+    def _write(self, path, writer, *args):
+        # Stream straight into gzip, then swap the file in atomically
+        tmp_path = f'{path}.tmp'
+        with gzip.open(tmp_path, 'wb') as raw, io.TextIOWrapper(raw, encoding='utf-8') as stream:
+            writer(stream, *args)
+        os.replace(tmp_path, path)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from chebitoch.cache_backend import get_redis
+from chebitoch.counters import flush_views
+
+
+class Command(BaseCommand):
+    help = "Apply the shared Redis buffer of post view counts to Post.views_count"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running and flush every this many seconds instead of once')
+
+    def handle(self, *args, **options):
+        if get_redis() is None:
+            # Without Redis each server process buffers its own hits and flushes them itself
+            raise CommandError(
+                "The view count buffer is only shared on the django_redis cache backend; "
+                "with other backends each process flushes its own buffer"
+            )
+        while True:
+            updated = flush_views()
+            self.stdout.write(self.style.SUCCESS(f"Flushed view counts for {updated} post(s)"))
+            if options['interval'] is None:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
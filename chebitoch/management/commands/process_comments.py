@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from chebitoch.comments import process_approvals, process_submissions, purge_processed
+
+
+class Command(BaseCommand):
+    help = "Move submitted comments from the outbox into the moderation queue and apply queued approvals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the outbox and approval queue and exit instead of polling')
+        parser.add_argument('--keep-days', type=int, default=7,
+                            help='Delete processed submissions older than this')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_submissions(options['batch_size'])
+            total += processed
+            if processed:
+                self.stdout.write(f"Queued {processed} comment(s) for moderation")
+                continue
+
+            approval = process_approvals()
+            if approval is not None:
+                if approval.processed_at:
+                    self.stdout.write(f"Approved {approval.approved} comment(s) for {approval}")
+                else:
+                    self.stderr.write(f"{approval} failed and will be retried: {approval.error}")
+                continue
+
+            purge_processed(timezone.now() - timedelta(days=options['keep_days']))
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} submission(s)"))
@@ -0,0 +1,116 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before serving its first request: load the WSGI app, then the URLconf
+BOOT_SNIPPET = """
+import time
+started = time.perf_counter()
+import MyBlog.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+print('BOOT_SECONDS', time.perf_counter() - started)
+"""
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """[(module, self µs, cumulative µs, depth)] from ``python -X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Profile worker boot: import time per module, package and installed app (python -X importtime)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Boots to time (imports are profiled on the last)')
+        parser.add_argument('--top', type=int, default=20, help='Modules to list')
+        parser.add_argument('--json', dest='json_path', help='Write the report as JSON to this path')
+
+    def _boot(self):
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'MyBlog.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SNIPPET],
+            capture_output=True, text=True, env=env, cwd=os.getcwd(),
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Worker boot failed:\n{result.stderr[-2000:]}')
+        seconds = float(result.stdout.split('BOOT_SECONDS')[-1])
+        return seconds, parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        boots = [self._boot() for _ in range(max(1, options['runs']))]
+        seconds = statistics.median(boot[0] for boot in boots)
+        rows = boots[-1][1]
+
+        by_package = defaultdict(int)
+        for module, self_us, _, _ in rows:
+            by_package[module.split('.')[0]] += self_us
+
+        app_names = sorted(((config.name, config.label) for config in apps.get_app_configs()), reverse=True)
+
+        def app_of(module):
+            for name, label in app_names:
+                if module == name or module.startswith(name + '.'):
+                    return label
+            return None
+
+        # importtime prints children before their parent, so walk backwards to know each module's importer
+        own, triggered = defaultdict(int), defaultdict(int)
+        stack = []
+        for module, self_us, cumulative_us, depth in reversed(rows):
+            del stack[depth:]
+            label = app_of(module)
+            if label:
+                own[label] += self_us
+                if not any(app_of(parent) == label for parent in stack):
+                    triggered[label] += cumulative_us
+            stack.append(module)
+        by_app = {label: {'own_us': own[label], 'cumulative_us': triggered[label]} for label in own}
+
+        report = {
+            'boot_seconds': round(seconds, 4),
+            'modules': len(rows),
+            'import_seconds': round(sum(row[1] for row in rows) / 1e6, 4),
+            'packages': dict(sorted(by_package.items(), key=lambda item: -item[1])),
+            'apps': dict(sorted(by_app.items(), key=lambda item: -item[1]['cumulative_us'])),
+            'slowest': [
+                {'module': module, 'self_us': self_us, 'cumulative_us': cumulative_us}
+                for module, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[2])[:options['top']]
+            ],
+        }
+
+        self.stdout.write(
+            f"Boot (median of {len(boots)}): {report['boot_seconds'] * 1000:.1f} ms, "
+            f"{report['modules']} modules, {report['import_seconds'] * 1000:.1f} ms importing"
+        )
+        self.stdout.write('\nBy package (self time):')
+        for package, micros in list(report['packages'].items())[:options['top']]:
+            self.stdout.write(f'  {package:<32} {micros / 1000:>8.1f} ms')
+        self.stdout.write('\nBy installed app (own / including what it pulls in):')
+        for label, timing in report['apps'].items():
+            self.stdout.write(
+                f"  {label:<32} {timing['own_us'] / 1000:>8.1f} ms {timing['cumulative_us'] / 1000:>8.1f} ms"
+            )
+        self.stdout.write('\nSlowest modules (cumulative):')
+        for row in report['slowest']:
+            self.stdout.write(f"  {row['module']:<48} {row['cumulative_us'] / 1000:>8.1f} ms")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chebitoch.surrogate import SITE_KEY, purge_endpoints, purge_keys
+
+
+class Command(BaseCommand):
+    help = "Purge surrogate keys (e.g. post-12 listing-home) from the front-end HTTP caches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('keys', nargs='*', help='Surrogate keys to purge')
+        parser.add_argument('--all', action='store_true', help=f'Purge every public page ({SITE_KEY})')
+
+    def handle(self, *args, **options):
+        keys = list(options['keys'])
+        if options['all']:
+            keys.append(SITE_KEY)
+        if not keys:
+            raise CommandError('Give surrogate keys to purge, or --all')
+        if not purge_endpoints():
+            raise CommandError('SURROGATE_PURGE_ENDPOINTS is not set')
+
+        for url, statuses in purge_keys(keys).items():
+            failed = [status for status in statuses if status is None or status >= 400]
+            style = self.style.ERROR if failed else self.style.SUCCESS
+            self.stdout.write(style(f"{url}: {', '.join(str(status) for status in statuses)}"))
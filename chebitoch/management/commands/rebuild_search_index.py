@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from chebitoch.models import Post
+from chebitoch.search import index_post
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search documents for published posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help="Only index published posts that have no search document yet",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.filter(status='published')
+        if options['missing']:
+            posts = posts.filter(search_document__isnull=True)
+
+        indexed = 0
+        for post in posts.iterator(chunk_size=200):
+            index_post(post)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} post(s)"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from chebitoch.content import CONTENT_VERSION
+from chebitoch.generations import bump_generation
+from chebitoch.models import Post
+from chebitoch.surrogate import queue_purge
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Re-render post bodies produced by an older content pipeline version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render every post')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('slug', 'content').order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(content_version=CONTENT_VERSION)
+
+        fields = ['rendered_content', 'toc', 'content_version']
+        batch, total = [], 0
+        for post in posts.iterator(chunk_size=BATCH_SIZE):
+            post.render_body()
+            batch.append(post)
+            if len(batch) >= BATCH_SIZE:
+                total += self._save(batch, fields)
+                batch = []
+        if batch:
+            total += self._save(batch, fields)
+
+        self.stdout.write(self.style.SUCCESS(f"Re-rendered {total} post(s) at content version {CONTENT_VERSION}"))
+
+    def _save(self, batch, fields):
+        Post.objects.bulk_update(batch, fields)
+        # bulk_update skips the signals that purge cached post pages
+        bump_generation(*(f'post:{post.slug}' for post in batch))
+        queue_purge(*(f'post-{post.pk}' for post in batch))
+        return len(batch)
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from chebitoch.analytics import rollup_hits
+from chebitoch.cache_backend import get_redis
+
+
+class Command(BaseCommand):
+    help = "Fold the shared Redis buffer of post hits into PostDailyStats"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep running and roll up every this many seconds instead of once')
+
+    def handle(self, *args, **options):
+        if get_redis() is None:
+            # Without Redis each server process buffers its own hits and rolls them up itself
+            raise CommandError(
+                "The analytics buffer is only shared on the django_redis cache backend; "
+                "with other backends each process rolls up its own buffer"
+            )
+        while True:
+            rolled_up = rollup_hits()
+            self.stdout.write(self.style.SUCCESS(f"Rolled up {rolled_up} hit(s)"))
+            if options['interval'] is None:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
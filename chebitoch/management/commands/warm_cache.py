@@ -0,0 +1,74 @@
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chebitoch.bench import summarize
+from chebitoch.cache_backend import uses_redis
+from chebitoch.suggest import get_index
+from chebitoch.warming import http_fetcher, warm, warm_paths, wsgi_fetcher
+
+
+class Command(BaseCommand):
+    help = "Request the public pages (popular posts first) to fill the caches after a deploy"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url',
+                            help='Warm a running site over HTTP (e.g. https://example.com) instead of in-process')
+        parser.add_argument('--domain', default=getattr(settings, 'SITEMAP_DOMAIN', None),
+                            help='Host header for in-process requests (defaults to SITEMAP_DOMAIN)')
+        parser.add_argument('--limit', type=int, default=None, help='Warm at most this many posts')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--rate', type=float, default=10.0,
+                            help='Maximum requests per second (0 for unlimited)')
+
+    def handle(self, *args, **options):
+        if options['base_url']:
+            fetch = http_fetcher(options['base_url'])
+        else:
+            # Pages embed absolute URLs, so warming under a guessed host would cache wrong links
+            if not options['domain']:
+                raise CommandError("Pass --domain or set SITEMAP_DOMAIN (or warm over HTTP with --base-url)")
+            if not uses_redis():
+                self.stderr.write(self.style.WARNING(
+                    'The cache is process-local, so in-process warming only fills shared layers; '
+                    'use --base-url to warm the running workers.'
+                ))
+            fetch = wsgi_fetcher(options['domain'])
+            logging.getLogger('chebitoch.perf').setLevel(logging.WARNING)
+            get_index()  # publishes the search-suggestion snapshot for every worker
+
+        paths = warm_paths(options['limit'])
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+
+        started = time.perf_counter()
+        results = warm(paths, fetch, options['concurrency'], options['rate'])
+        elapsed = time.perf_counter() - started
+
+        by_kind = defaultdict(list)
+        failures = []
+        for kind, path, code, seconds, _ in results:
+            by_kind[kind].append(seconds)
+            if code != 200:
+                failures.append((path, code))
+
+        for kind, latencies in by_kind.items():
+            summary = summarize(latencies)
+            self.stdout.write(
+                f"{kind:<12} {summary['requests']:>6} pages  p50 {summary['p50_ms']:>8.1f} ms  "
+                f"p95 {summary['p95_ms']:>8.1f} ms  max {summary['max_ms']:>8.1f} ms"
+            )
+        for path, code in failures:
+            self.stderr.write(f"{path}: {'no response' if code == 0 else f'HTTP {code}'}")
+        slowest = sorted(results, key=lambda row: row[3], reverse=True)[:5]
+        if options['verbosity'] > 1:
+            for _, path, _, seconds, _ in slowest:
+                self.stdout.write(f"  slow: {path} {seconds * 1000:.1f} ms")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {len(results) - len(failures)}/{len(results)} pages in {elapsed:.1f}s "
+            f"({len(results) / elapsed:.1f} req/s)" if elapsed else "Nothing to warm"
+        ))
@@ -0,0 +1,156 @@
+"""Per-request performance metrics.
+
+PerformanceMiddleware opens a RequestMetrics for every request; SQL is timed
+through connection.execute_wrapper, template rendering through a wrapper on
+the Django template backend, and cache helpers report hits and misses via
+record_cache(). Finished requests are logged as one JSON line, exposed as a
+Server-Timing header and folded into per-URL-name latency percentiles.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger('chebitoch.perf')
+
+SAMPLES_PER_VIEW = 1000
+
+_current = ContextVar('chebitoch_request_metrics', default=None)
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_VIEW))
+_samples_lock = threading.Lock()
+_template_timer_installed = False
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def sql_shape(sql):
+    """Normalise a statement so repeats with different parameters compare equal."""
+    return _LITERAL_RE.sub('?', _IN_LIST_RE.sub('IN (...)', sql))
+
+
+def n_plus_one_threshold():
+    return getattr(settings, 'PERF_N_PLUS_ONE_THRESHOLD', 10)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shapes = Counter()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.query_count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def repeated_queries(self):
+        threshold = n_plus_one_threshold()
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self):
+        return ', '.join([
+            f'total;dur={self.duration * 1000:.1f}',
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ])
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(metrics, token, request, response):
+    _current.reset(token)
+    metrics.duration = time.perf_counter() - metrics.started
+    match = getattr(request, 'resolver_match', None)
+    view_name = (match.view_name if match else None) or 'unresolved'
+    size = len(response.content) if not response.streaming else None
+
+    with _samples_lock:
+        _samples[view_name].append(metrics.duration)
+
+    logger.info(json.dumps({
+        'view': view_name,
+        'method': request.method,
+        'status': response.status_code,
+        'duration_ms': round(metrics.duration * 1000, 2),
+        'queries': metrics.query_count,
+        'sql_ms': round(metrics.sql_time * 1000, 2),
+        'template_ms': round(metrics.template_time * 1000, 2),
+        'cache_hits': metrics.cache_hits,
+        'cache_misses': metrics.cache_misses,
+        'bytes': size,
+    }))
+    for shape, count in metrics.repeated_queries():
+        logger.warning('Possible N+1 in %s: %d x %s', view_name, count, shape)
+
+
+def record_cache(hit):
+    """Count a cache lookup against the current request, if there is one."""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def install_template_timer():
+    """Time every top-level template render (includes are counted once)."""
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return original_render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+    Template.render = timed_render
+    _template_timer_installed = True
+
+
+def _percentile(ordered, fraction):
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def snapshot():
+    """p50/p95/p99 latency (ms) per view over the most recent samples."""
+    with _samples_lock:
+        samples = {name: sorted(values) for name, values in _samples.items() if values}
+    return {
+        name: {
+            'count': len(ordered),
+            'p50_ms': round(_percentile(ordered, 0.50) * 1000, 2),
+            'p95_ms': round(_percentile(ordered, 0.95) * 1000, 2),
+            'p99_ms': round(_percentile(ordered, 0.99) * 1000, 2),
+        }
+        for name, ordered in samples.items()
+    }
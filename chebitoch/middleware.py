@@ -0,0 +1,54 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import finish_request, install_template_timer, start_request
+from .page_cache import is_cacheable_request
+from .routers import PIN_COOKIE, begin_replica_reads, end_replica_reads
+
+
+class PerformanceMiddleware:
+    """Record wall time, SQL, template and cache metrics for each request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PERF_METRICS_ENABLED', True)
+        self.server_timing = getattr(settings, 'PERF_SERVER_TIMING', settings.DEBUG)
+        if self.enabled:
+            install_template_timer()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics, token = start_request()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+            response = self.get_response(request)
+        finish_request(metrics, token, request, response)
+
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+class ReplicaMiddleware:
+    """Let anonymous reads use replicas; pin readers to the primary briefly after they write"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+
+    def __call__(self, request):
+        use_replicas = is_cacheable_request(request) and PIN_COOKIE not in request.COOKIES
+        token = begin_replica_reads(use_replicas)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = end_replica_reads(token)
+
+        if state.wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:40
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_vector_index(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL; other backends use SearchPosting
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS chebitoch_searchdocument_vector_gin '
+            'ON chebitoch_searchdocument USING gin (vector)'
+        )
+
+
+def drop_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS chebitoch_searchdocument_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0004_category_meta_description_post_keywords_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.TextField()),
+                ('keywords', models.TextField(blank=True)),
+                ('excerpt', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('length', models.PositiveIntegerField(default=0)),
+                ('vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='chebitoch.post')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('frequency', models.FloatField(help_text='Field-weighted term frequency')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='chebitoch.searchdocument')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='chebitoch_s_term_435899_idx')],
+            },
+        ),
+        migrations.RunPython(create_vector_index, drop_vector_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:40
+
+import math
+from html import unescape
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def backfill_text_stats(apps, schema_editor):
+    # Mirrors Post.save(); historical models don't carry custom save logic
+    Post = apps.get_model('chebitoch', 'Post')
+    batch = []
+    for post in Post.objects.only('content', 'excerpt').iterator(chunk_size=500):
+        plain_text = unescape(strip_tags(post.content))
+        post.word_count = len(plain_text.split())
+        post.read_time = max(1, math.ceil(post.word_count / 200))
+        post.plain_excerpt = Truncator(unescape(strip_tags(post.excerpt)) or plain_text).words(30)
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['word_count', 'read_time', 'plain_excerpt'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['word_count', 'read_time', 'plain_excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0005_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='plain_excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='read_time',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_text_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0006_post_derived_text_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'updated_at'], name='chebitoch_p_status_c1b15a_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0007_post_status_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTermWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_weights', to='chebitoch.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='chebitoch_p_term_41e02c_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='chebitoch.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='chebitoch.post')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['post', 'rank'], name='chebitoch_r_post_id_477986_idx')],
+            },
+        ),
+    ]
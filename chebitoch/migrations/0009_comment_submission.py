@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0008_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('email', models.EmailField(max_length=254)),
+                ('content', models.TextField()),
+                ('submitted_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_submissions', to='chebitoch.post')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='chebitoch_c_process_c17afe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0009_comment_submission'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='chebitoch_c_post_id_ebde69_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'active', 'created_at', 'id'], name='chebitoch_c_post_id_fdab47_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0012_post_rendered_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_visitors_estimate', models.PositiveIntegerField(default=0)),
+                ('visitors_sketch', models.BinaryField(default=bytes)),
+                ('referrers', models.JSONField(blank=True, default=dict, editable=False)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='chebitoch.post')),
+            ],
+            options={
+                'verbose_name_plural': 'Post daily stats',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'post'], name='chebitoch_p_date_5b7a3f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'date'), name='unique_post_daily_stats')],
+            },
+        ),
+    ]
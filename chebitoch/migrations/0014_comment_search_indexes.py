@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:11
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+CONTENT_INDEX = 'chebitoch_comment_content_fts'
+
+
+def create_content_index(apps, schema_editor):
+    # GIN indexes only exist on PostgreSQL; other backends search comments with LIKE
+    if schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        # Same expression as chebitoch.comments.content_search, so the planner can use it
+        index = GinIndex(SearchVector('content', config='simple'), name=CONTENT_INDEX)
+        schema_editor.add_index(apps.get_model('chebitoch', 'Comment'), index)
+
+
+def drop_content_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {CONTENT_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0013_post_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='chebitoch_comment_email_upper'),
+        ),
+        migrations.RunPython(create_content_index, drop_content_index),
+    ]
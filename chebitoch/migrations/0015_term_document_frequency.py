@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0014_comment_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermDocumentFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True)),
+                ('documents', models.PositiveIntegerField()),
+            ],
+        ),
+    ]
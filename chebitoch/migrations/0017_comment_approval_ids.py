@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0016_comment_approval'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='commentapproval',
+            name='query',
+        ),
+        migrations.AddField(
+            model_name='commentapproval',
+            name='comment_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+    ]
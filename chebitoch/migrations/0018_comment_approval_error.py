@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chebitoch', '0017_comment_approval_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='commentapproval',
+            name='error',
+            field=models.TextField(blank=True, help_text='Last failure; the approval is retried after the claim times out'),
+        ),
+    ]
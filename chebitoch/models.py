@@ -1,10 +1,21 @@
 # models.py
 import math
+from html import unescape
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Upper
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from .content import CONTENT_VERSION, render_content
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 30
+# Fields fill_derived_fields reads; partial saves touching none of them skip it
+DERIVED_FROM = {'title', 'content', 'excerpt', 'slug', 'meta_title', 'meta_description'}
 
 
 class Category(models.Model):
@@ -43,6 +54,8 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     featured_image = models.URLField(blank=True, null=True)
+    # Resized renditions of featured_image, maintained by chebitoch.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     # SEO Fields
     meta_title = models.CharField(max_length=70, blank=True, help_text="SEO title (60-70 chars)")
@@ -52,18 +65,36 @@ class Post(models.Model):
     # Performance
     views_count = models.PositiveIntegerField(default=0)
 
+    # Derived from content on save so listings never load or strip the body
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    read_time = models.PositiveSmallIntegerField(default=1, editable=False)
+    plain_excerpt = models.TextField(blank=True, editable=False)
+
+    # Sanitized body and table of contents served on the post page, see chebitoch.content
+    rendered_content = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    content_version = models.PositiveSmallIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at', 'status']),
             models.Index(fields=['slug']),
             models.Index(fields=['status', 'category']),
+            models.Index(fields=['status', 'updated_at']),
         ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or DERIVED_FROM & set(update_fields):
+            self.fill_derived_fields()
+        super().save(*args, **kwargs)
+
+    def fill_derived_fields(self):
+        """Populate slug, SEO and text-stat fields; also used before bulk_create."""
         if not self.slug:
             self.slug = slugify(self.title)
 
@@ -71,28 +102,35 @@ class Post(models.Model):
         if not self.meta_title:
             self.meta_title = self.title[:67] + '...' if len(self.title) > 70 else self.title
 
+        plain_text = unescape(strip_tags(self.content))
+        self.word_count = len(plain_text.split())
+        self.read_time = max(1, math.ceil(self.word_count / WORDS_PER_MINUTE))
+        self.plain_excerpt = Truncator(unescape(strip_tags(self.excerpt)) or plain_text).words(EXCERPT_WORDS)
+
+        self.render_body()
+
         if not self.meta_description:
             if self.excerpt:
                 desc = self.excerpt
             else:
-                desc = strip_tags(self.content)
+                desc = plain_text
             self.meta_description = desc[:157] + '...' if len(desc) > 160 else desc
 
-        super().save(*args, **kwargs)
+    def render_body(self):
+        self.rendered_content, self.toc = render_content(self.content)
+        self.content_version = CONTENT_VERSION
 
     def get_absolute_url(self):
         return reverse('post_detail', kwargs={'slug': self.slug})
 
     def get_read_time(self):
-        """Calculates read time assuming 200 words per minute."""
-        word_count = len(strip_tags(self.content).split())
-        read_time = math.ceil(word_count / 200)
-        return read_time if read_time > 0 else 1
+        """Read time in minutes, precomputed in save() at 200 words per minute."""
+        return self.read_time
 
     def increment_views(self):
-        """Increment view count for analytics"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Buffer a view; chebitoch.counters flushes it to views_count in batches"""
+        from .counters import record_view
+        record_view(self.pk)
 
 
 class Comment(models.Model):
@@ -106,8 +144,149 @@ class Comment(models.Model):
     class Meta:
         ordering = ['created_at']
         indexes = [
-            models.Index(fields=['post', 'active']),
+            # Also serves the (created_at, id) keyset scan of a post's thread
+            models.Index(fields=['post', 'active', 'created_at', 'id']),
+            # Admin lookups by email (email__iexact compares UPPER(email))
+            models.Index(Upper('email'), name='chebitoch_comment_email_upper'),
+        ]
+
+    def __str__(self):
+        return f'Comment by {self.name} on {self.post}'
+
+
+class CommentSubmission(models.Model):
+    """Outbox of submitted comments, turned into Comments by the process_comments worker"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comment_submissions')
+    name = models.CharField(max_length=80)
+    email = models.EmailField()
+    content = models.TextField()
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'Submission by {self.name} on post {self.post_id}'
+
+
+class CommentApproval(models.Model):
+    """Queued bulk approval of one chunk of selected comments, applied by the process_comments worker"""
+    comment_ids = models.JSONField(default=list, editable=False)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    approved = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, help_text="Last failure; the approval is retried after the claim times out")
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f'Comment approval #{self.pk}'
+
+
+class SearchDocument(models.Model):
+    """Precomputed search text for a published Post, maintained by chebitoch.search"""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='search_document')
+    title = models.TextField()
+    keywords = models.TextField(blank=True)
+    excerpt = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+
+    # Weighted token count, used for BM25 length normalisation
+    length = models.PositiveIntegerField(default=0)
+
+    # Only populated on PostgreSQL (GIN-indexed, see migration 0005)
+    vector = SearchVectorField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Search document for {self.post_id}'
+
+
+class SearchPosting(models.Model):
+    """Inverted index entry for the pure-Python BM25 fallback"""
+    term = models.CharField(max_length=64)
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.FloatField(help_text="Field-weighted term frequency")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term']),
+        ]
+
+    def __str__(self):
+        return f'{self.term} in {self.document_id}'
+
+
+class TermDocumentFrequency(models.Model):
+    """How many published posts used a term at the last full related-posts build"""
+    term = models.CharField(max_length=64, unique=True)
+    documents = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.term}: {self.documents}'
+
+
+class PostTermWeight(models.Model):
+    """Top TF-IDF terms of a published post, used to find related posts"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='term_weights')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term']),
+        ]
+
+    def __str__(self):
+        return f'{self.term} ({self.weight:.3f}) in {self.post_id}'
+
+
+class RelatedPost(models.Model):
+    """Precomputed "read next" neighbours of a post, best first"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+
+    def __str__(self):
+        return f'{self.related_id} related to {self.post_id}'
+
+
+class PostDailyStats(models.Model):
+    """A post's views on one day, rolled up from buffered hits (see chebitoch.analytics)"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors_estimate = models.PositiveIntegerField(default=0)
+    # Compressed HyperLogLog registers (chebitoch.hll), merged across days for ranges
+    visitors_sketch = models.BinaryField(default=bytes, editable=False)
+    # Referring host -> views, the most frequent hosts only
+    referrers = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = 'Post daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='unique_post_daily_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'post']),
         ]
 
     def __str__(self):
-        return f'Comment by {self.name} on {self.post}'
\ No newline at end of file
+        return f'{self.post_id} on {self.date}'
@@ -0,0 +1,98 @@
+"""Rendered-response cache for anonymous GETs on the public views.
+
+Entries are keyed by scheme, host, path + query string (pages embed
+absolute URLs built from the request) and by the generations of the tags
+a view depends on (see chebitoch.generations); model signals bump those tags
+so edits purge exactly the affected pages.
+"""
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .generations import get_generations
+from .metrics import record_cache
+
+SITE_TAG = 'site'
+CSRF_PLACEHOLDER = '__CSRF_TOKEN__'
+
+_CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def page_cache_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def is_cacheable_request(request):
+    """Anonymous visitors with no session and no pending flash messages."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def page_cache_key(request, tags, extra=''):
+    generations = get_generations(SITE_TAG, *tags)
+    raw = '|'.join([
+        request.scheme, request.get_host(), request.get_full_path(), *tags, *map(str, generations), extra,
+    ])
+    return 'page:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def cache_public_page(*tag_patterns, on_hit=None, extra=None):
+    """Cache a view's rendered response for anonymous visitors.
+
+    ``tag_patterns`` are formatted with the view kwargs (e.g. ``'post:{slug}'``).
+    ``extra(request)`` returns page state that has no generation (such as
+    the trending footer); it is part of the key, like the tags.
+    Views can attach ``response.page_cache_extras`` (a dict) which is stored
+    with the entry and passed to ``on_hit(request, extras)`` on cache hits,
+    so side effects such as view counting still happen. Surrogate keys the
+    view set (``response.surrogate_keys``) are replayed on hits.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_cacheable_request(request):
+                return view(request, *args, **kwargs)
+
+            key = page_cache_key(
+                request, [pattern.format(**kwargs) for pattern in tag_patterns],
+                extra(request) if extra is not None else '',
+            )
+            entry = cache.get(key)
+            record_cache(entry is not None)
+            if entry is not None:
+                if on_hit is not None:
+                    on_hit(request, entry['extras'])
+                # Each visitor still gets their own CSRF token (and cookie), if the page has a form
+                content = entry['content']
+                if CSRF_PLACEHOLDER.encode() in content:
+                    content = content.replace(CSRF_PLACEHOLDER.encode(), get_token(request).encode())
+                response = HttpResponse(content, content_type=entry['content_type'])
+                response.surrogate_keys = entry.get('surrogate_keys', ())
+                response['X-Page-Cache'] = 'hit'
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                content = _CSRF_INPUT_RE.sub(
+                    rf'\g<1>{CSRF_PLACEHOLDER}\g<2>', response.content.decode(response.charset)
+                )
+                cache.set(key, {
+                    'content': content.encode(response.charset),
+                    'content_type': response['Content-Type'],
+                    'extras': getattr(response, 'page_cache_extras', {}),
+                    'surrogate_keys': list(getattr(response, 'surrogate_keys', ())),
+                }, page_cache_timeout())
+                response['X-Page-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,202 @@
+"""Keyset (cursor) pagination for post listings.
+
+Pages are addressed by an opaque token holding the (created_at, id) of the
+row at the page boundary, so every page is a single indexed range scan with
+no COUNT(*) or OFFSET, however deep the reader goes.
+
+Admin changelists use EstimatedCountPaginator, which bounds the COUNT(*)
+Django's paginator would otherwise run over the whole table.
+"""
+import base64
+import binascii
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .caching import cached_computation
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, pk, number):
+    raw = f'{created_at.isoformat()}|{pk}|{number}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (created_at, pk, page number) from a cursor token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk, number = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk), int(number)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(token)
+
+
+class CursorPage:
+    def __init__(self, object_list, number, has_next, has_previous, total=None, per_page=None):
+        self.object_list = object_list
+        self.number = number
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.total = total
+        self.per_page = per_page
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def num_pages(self):
+        """Approximate page count from the cached total, if one is available."""
+        if self.total is None or not self.per_page:
+            return None
+        return max(self.number, math.ceil(self.total / self.per_page))
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.created_at, last.pk, self.number + 1)
+
+    @property
+    def previous_cursor(self):
+        """Token for the previous page, or None when it is the first page."""
+        if not self.has_previous_page or self.number <= 2:
+            return None
+        first = self.object_list[0]
+        return encode_cursor(first.created_at, first.pk, self.number - 1)
+
+
+class KeysetPaginator:
+    """Paginate a post queryset newest-first over (created_at, id)."""
+
+    def __init__(self, queryset, per_page, total_key=None, total_timeout=3600):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.total_key = total_key
+        self.total_timeout = total_timeout
+
+    def total(self):
+        """Cached row count for the page-number UI.
+
+        ``total_key`` doubles as the page-cache tag of the listing, so the
+        count is invalidated by the same signals that purge its pages.
+        """
+        if self.total_key is None:
+            return None
+        return cached_computation(
+            f'listing-total:{self.total_key}', self.queryset.count, self.total_timeout,
+            generations=[self.total_key],
+        )
+
+    def page(self, after=None, before=None):
+        if before is not None:
+            created_at, pk, number = decode_cursor(before)
+            rows = list(
+                self.queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+                .order_by('created_at', 'pk')[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            # Self-correct a stale page number once we reach the start
+            number = number if has_previous else 1
+            return CursorPage(rows, number, True, has_previous, self.total(), self.per_page)
+
+        number = 1
+        queryset = self.queryset.order_by('-created_at', '-pk')
+        if after is not None:
+            created_at, pk, number = decode_cursor(after)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], number, has_next, after is not None, self.total(), self.per_page)
+
+    def cursor_for_page(self, number):
+        """Translate a legacy ?page=N into an ?after= token (one OFFSET lookup)."""
+        if number <= 1:
+            return None
+        offset = (number - 1) * self.per_page - 1
+        boundary = self.queryset.order_by('-created_at', '-pk').values_list('created_at', 'pk')[offset:offset + 1]
+        for created_at, pk in boundary:
+            return encode_cursor(created_at, pk, number)
+        return None
+
+
+def paginate_posts(request, queryset, per_page, total_key=None):
+    """Return (page, redirect_url) for a listing request.
+
+    ``redirect_url`` is set for legacy ``?page=N`` links, mapped onto their
+    current cursor URL. The target moves as posts are published, so callers
+    redirect temporarily (302).
+    """
+    paginator = KeysetPaginator(queryset, per_page, total_key=total_key)
+
+    if 'page' in request.GET:
+        try:
+            cursor = paginator.cursor_for_page(int(request.GET['page']))
+        except ValueError:
+            cursor = None
+        return None, f'{request.path}?after={cursor}' if cursor else request.path
+
+    try:
+        return paginator.page(after=request.GET.get('after'), before=request.GET.get('before')), None
+    except InvalidCursor:
+        return paginator.page(), None
+
+
+def admin_count_limit():
+    return getattr(settings, 'ADMIN_COUNT_LIMIT', 10000)
+
+
+def estimated_table_count(queryset):
+    """Row count of a queryset's whole table without scanning it when it is large.
+
+    PostgreSQL's planner estimate (pg_class.reltuples, kept current by
+    autovacuum/ANALYZE) is used above ADMIN_COUNT_LIMIT rows; smaller tables
+    and other backends get an exact count cached for five minutes.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > admin_count_limit():
+            return row[0]
+    return cached_computation(f'table-count:{model._meta.label_lower}', model._default_manager.count, 300)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator for admin changelists over big tables.
+
+    An unfiltered changelist counts with ``estimated_table_count``; filtered
+    or searched ones count at most ADMIN_COUNT_LIMIT rows, so matches past
+    that are reached by narrowing the filter rather than paging.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return estimated_table_count(queryset)
+        return queryset[:admin_count_limit()].count()
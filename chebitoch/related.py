@@ -0,0 +1,263 @@
+"""Related-posts ("read next") index.
+
+Each published post is reduced to a sparse, L2-normalised TF-IDF vector over
+its title, keywords, category and plain-text body, keeping only its
+strongest terms (PostTermWeight). Cosine neighbours are precomputed into
+RelatedPost, so rendering a post's related list is one indexed lookup.
+
+``build_related_index`` recomputes everything in one batch over compact
+in-memory postings and records each term's document frequency
+(TermDocumentFrequency). ``refresh_related_posts`` updates a single post
+against those frequencies, then recomputes the lists it left or entered;
+it runs in the background after a save commits, and falls back to a full
+build while no frequencies have been recorded yet (a fresh deploy).
+"""
+import logging
+import math
+import threading
+from array import array
+from collections import Counter, defaultdict
+
+from django.db import close_old_connections, transaction
+from django.utils.html import strip_tags
+
+from .caching import single_flight
+from .models import Post, PostTermWeight, RelatedPost, SearchDocument, TermDocumentFrequency
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 4
+TERMS_PER_POST = 25
+MAX_POSTINGS = 300
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+FIELD_WEIGHTS = {'title': 3, 'keywords': 2, 'category': 2, 'body': 1}
+
+# TermDocumentFrequency row holding the corpus size (tokenize never yields '')
+CORPUS_TERM = ''
+
+
+def term_counts(title, keywords, category, body):
+    counts = Counter()
+    for field, text in (('title', title), ('keywords', keywords.replace(',', ' ')),
+                        ('category', category), ('body', body)):
+        for term in tokenize(text or ''):
+            counts[term] += FIELD_WEIGHTS[field]
+    return counts
+
+
+def tfidf_vector(counts, document_frequency, total):
+    """Top TERMS_PER_POST terms by TF-IDF, L2-normalised, as {term: weight}."""
+    weights = {}
+    for term, count in counts.items():
+        df = document_frequency.get(term, 1)
+        if total > 1 and df > MAX_DOCUMENT_FREQUENCY * total:
+            continue
+        weights[term] = (1 + math.log(count)) * math.log((1 + total) / (1 + df))
+    top = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:TERMS_PER_POST]
+    norm = math.sqrt(sum(weight * weight for _, weight in top)) or 1.0
+    return {term: weight / norm for term, weight in top if weight > 0}
+
+
+def _documents():
+    return SearchDocument.objects.select_related('post__category').only(
+        'title', 'keywords', 'body', 'post__category__name'
+    ).order_by('post_id')
+
+
+def _document_counts(document):
+    category = document.post.category.name if document.post.category_id else ''
+    return term_counts(document.title, document.keywords, category, document.body)
+
+
+def _write_neighbours(post_id, neighbours):
+    RelatedPost.objects.filter(post_id=post_id).delete()
+    RelatedPost.objects.bulk_create(
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+        for rank, (related_id, score) in enumerate(neighbours, start=1)
+    )
+
+
+def build_related_index(log=None):
+    """Recompute every post's vector and neighbours. Returns the post count."""
+    # Pass 1: document frequencies
+    document_frequency = Counter()
+    total = 0
+    for document in _documents().iterator(chunk_size=500):
+        document_frequency.update(_document_counts(document).keys())
+        total += 1
+
+    # Pass 2: vectors, stored compactly as parallel term-id/weight arrays
+    vocabulary = {}
+    vectors = {}
+    postings = defaultdict(list)
+    weight_rows = []
+    for document in _documents().iterator(chunk_size=500):
+        vector = tfidf_vector(_document_counts(document), document_frequency, total)
+        term_ids = array('i', (vocabulary.setdefault(term, len(vocabulary)) for term in vector))
+        vectors[document.post_id] = (term_ids, array('f', vector.values()))
+        for term_id, weight in zip(term_ids, vector.values()):
+            postings[term_id].append((weight, document.post_id))
+        weight_rows.extend(
+            PostTermWeight(post_id=document.post_id, term=term, weight=weight)
+            for term, weight in vector.items()
+        )
+
+    # Keep only the strongest postings per term to bound the dot products
+    compact = {}
+    for term_id, entries in postings.items():
+        entries.sort(reverse=True)
+        entries = entries[:MAX_POSTINGS]
+        compact[term_id] = (array('q', (post_id for _, post_id in entries)),
+                            array('f', (weight for weight, _ in entries)))
+    del postings
+
+    neighbours = {}
+    for post_id, (term_ids, weights) in vectors.items():
+        scores = defaultdict(float)
+        for term_id, weight in zip(term_ids, weights):
+            ids, other_weights = compact[term_id]
+            for other_id, other_weight in zip(ids, other_weights):
+                scores[other_id] += weight * other_weight
+        scores.pop(post_id, None)
+        neighbours[post_id] = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:TOP_K]
+        if log and len(neighbours) % 1000 == 0:
+            log(f'Scored {len(neighbours)}/{total} posts')
+
+    with transaction.atomic():
+        TermDocumentFrequency.objects.all().delete()
+        TermDocumentFrequency.objects.bulk_create(
+            (TermDocumentFrequency(term=term, documents=documents)
+             for term, documents in [(CORPUS_TERM, total), *document_frequency.items()]),
+            batch_size=2000,
+        )
+        PostTermWeight.objects.all().delete()
+        PostTermWeight.objects.bulk_create(weight_rows, batch_size=2000)
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(
+            (RelatedPost(post_id=post_id, related_id=related_id, score=score, rank=rank)
+             for post_id, ranked in neighbours.items()
+             for rank, (related_id, score) in enumerate(ranked, start=1)),
+            batch_size=2000,
+        )
+    return total
+
+
+def _rank_neighbours(post_id, vector):
+    """[(other post id, cosine score)] best first, scored against the stored vectors"""
+    scores = defaultdict(float)
+    rows = PostTermWeight.objects.filter(term__in=list(vector)).exclude(post_id=post_id)
+    for other_id, term, weight in rows.values_list('post_id', 'term', 'weight'):
+        scores[other_id] += vector[term] * weight
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _recompute_lists(owner_ids):
+    """Rebuild the neighbour lists of these posts from their stored vectors"""
+    vectors = defaultdict(dict)
+    for owner_id, term, weight in PostTermWeight.objects.filter(post_id__in=owner_ids).values_list(
+        'post_id', 'term', 'weight'
+    ):
+        vectors[owner_id][term] = weight
+    for owner_id in owner_ids:
+        _write_neighbours(owner_id, _rank_neighbours(owner_id, vectors[owner_id])[:TOP_K])
+
+
+def refresh_related_posts(post):
+    """Recompute one post's vector and neighbours, and the lists it leaves or enters."""
+    with transaction.atomic():
+        # Lists the post is in now; they are recomputed rather than left a slot short
+        previous_owners = set(RelatedPost.objects.filter(related_id=post.pk).values_list('post_id', flat=True))
+        PostTermWeight.objects.filter(post_id=post.pk).delete()
+        if post.status != 'published':
+            RelatedPost.objects.filter(post_id=post.pk).delete()
+            _recompute_lists(previous_owners)
+            return
+
+        category = post.category.name if post.category_id else ''
+        counts = term_counts(post.title, post.keywords, category, strip_tags(post.content))
+        # Frequencies from the last full build; terms it dropped as too common keep their real df
+        document_frequency = dict(
+            TermDocumentFrequency.objects.filter(term__in=[CORPUS_TERM, *counts]).values_list('term', 'documents')
+        )
+        total = document_frequency.pop(CORPUS_TERM, None) or Post.objects.filter(status='published').count()
+        vector = tfidf_vector(counts, document_frequency, total)
+        PostTermWeight.objects.bulk_create(
+            PostTermWeight(post_id=post.pk, term=term, weight=weight) for term, weight in vector.items()
+        )
+
+        ranked = _rank_neighbours(post.pk, vector)
+        _write_neighbours(post.pk, ranked[:TOP_K])
+
+        # Close posts whose weakest entry it now beats get it inserted, displacing only that entry
+        candidates = {owner_id: score for owner_id, score in ranked[:TOP_K * 5] if owner_id not in previous_owners}
+        current = defaultdict(list)
+        for owner_id, related_id, score in RelatedPost.objects.filter(
+            post_id__in=list(candidates)
+        ).values_list('post_id', 'related_id', 'score'):
+            current[owner_id].append((related_id, score))
+        for owner_id, score in candidates.items():
+            entries = current[owner_id]
+            if len(entries) < TOP_K or score > min(entry_score for _, entry_score in entries):
+                entries.append((post.pk, score))
+                entries.sort(key=lambda item: item[1], reverse=True)
+                _write_neighbours(owner_id, entries[:TOP_K])
+
+        # Lists it was already in: its score changed, so rank them again
+        _recompute_lists(previous_owners)
+
+
+def _in_background(name, target, *args):
+    def run():
+        try:
+            target(*args)
+        except Exception:
+            logger.exception('Related posts update %s failed', name)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def index_built():
+    return TermDocumentFrequency.objects.filter(term=CORPUS_TERM).exists()
+
+
+def _refresh_post(post_id):
+    if not index_built():
+        # Without frequencies every df would be 1 and there are no vectors to rank against
+        with single_flight('related:build', blocking=False) as acquired:
+            if acquired:
+                build_related_index()
+        return
+    post = Post.objects.select_related('category').filter(pk=post_id).first()
+    if post is not None:
+        refresh_related_posts(post)
+
+
+def _refill_lists(owner_ids):
+    with transaction.atomic():
+        _recompute_lists(owner_ids)
+
+
+def schedule_related_refresh(post_id):
+    """Run ``refresh_related_posts`` for a saved post off the request thread"""
+    _in_background(f'related-posts-{post_id}', _refresh_post, post_id)
+
+
+def schedule_list_refill(owner_ids):
+    """Recompute, off the request thread, the lists a deleted post was removed from"""
+    _in_background('related-posts-refill', _refill_lists, list(owner_ids))
+
+
+def related_posts(post):
+    """The post's precomputed neighbours, best first (one indexed query)."""
+    return [
+        entry.related
+        for entry in RelatedPost.objects.filter(post=post, related__status='published')
+        .select_related('related').only(
+            'related__title', 'related__slug', 'related__featured_image', 'related__image_variants',
+            'related__read_time', 'related__created_at',
+        )
+    ]
@@ -0,0 +1,104 @@
+"""Send the public read paths to read replicas.
+
+ReplicaMiddleware marks anonymous GET/HEAD requests as replica-safe; the
+router then spreads their reads round-robin over the healthy replicas in
+DATABASE_REPLICA_URLS. Everything else (admin, logged-in users, POSTs,
+management commands, background threads) reads from the primary.
+
+A request that writes is pinned to the primary for the rest of the
+request, and the response sets a short-lived cookie so the reader's next
+requests (e.g. the redirect after submitting a comment) also see their
+own writes.
+"""
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = 'pin_primary'
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+class ReadState:
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def begin_replica_reads(use_replicas):
+    """Start tracking a request; its reads may go to replicas if ``use_replicas``"""
+    return _request_state.set(ReadState(use_replicas))
+
+
+def end_replica_reads(token):
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state
+
+
+class ReplicaPool:
+    """Round-robin over replica aliases, skipping ones that recently failed a health check"""
+
+    def __init__(self, aliases):
+        self.aliases = aliases
+        self._cycle = itertools.cycle(aliases)
+        self._lock = threading.Lock()
+        self._checked = {}  # alias -> monotonic time of the last successful check
+        self._down_until = {}
+
+    def _healthy(self, alias):
+        now = time.monotonic()
+        if self._down_until.get(alias, 0) > now:
+            return False
+        if now - self._checked.get(alias, float('-inf')) < getattr(settings, 'REPLICA_HEALTH_INTERVAL', 5):
+            return True
+        connection = connections[alias]
+        try:
+            if connection.connection is not None and not connection.is_usable():
+                connection.close()
+            connection.ensure_connection()
+        except DatabaseError:
+            self._down_until[alias] = now + getattr(settings, 'REPLICA_RETRY_AFTER', 30)
+            return False
+        self._checked[alias] = now
+        return True
+
+    def choose(self):
+        for _ in range(len(self.aliases)):
+            with self._lock:
+                alias = next(self._cycle)
+            if self._healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.pool = ReplicaPool(replica_aliases())
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or not state.use_replicas or state.wrote or not self.pool.aliases:
+            return DEFAULT_DB_ALIAS
+        return self.pool.choose()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so rows from any of them can be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
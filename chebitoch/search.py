@@ -0,0 +1,166 @@
+"""Ranked full-text search over published posts.
+
+Every published Post gets a SearchDocument (title > keywords > excerpt >
+content). On PostgreSQL the document carries a weighted tsvector behind a GIN
+index; elsewhere an inverted index (SearchPosting) is scored with BM25.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F
+from django.utils.html import strip_tags
+
+from .caching import cached_computation
+from .generations import bump_generation
+from .models import Post, SearchDocument, SearchPosting
+
+RESULTS_PER_PAGE = 9
+MAX_RESULTS = 500
+
+# Relative weight of each field, mirroring tsvector weights A/B/C/D
+FIELD_WEIGHTS = (
+    ('title', 3.0),
+    ('keywords', 2.0),
+    ('excerpt', 1.5),
+    ('body', 1.0),
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it
+its me my of on or our she so that the their them then there these they this
+to was we were what when which who will with you your
+""".split())
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """Lowercased terms with stopwords dropped and plural 's' folded."""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.append(token[:64])
+    return terms
+
+
+def index_post(post):
+    """Create, refresh or drop the search document for a post."""
+    if post.status != 'published':
+        SearchDocument.objects.filter(post_id=post.pk).delete()
+        bump_generation('search')
+        return None
+
+    fields = {
+        'title': post.title,
+        'keywords': post.keywords.replace(',', ' '),
+        'excerpt': post.excerpt,
+        'body': strip_tags(post.content),
+    }
+    weighted = Counter()
+    for name, weight in FIELD_WEIGHTS:
+        for term in tokenize(fields[name]):
+            weighted[term] += weight
+
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.update_or_create(
+            post_id=post.pk,
+            defaults=dict(fields, length=round(sum(weighted.values()))),
+        )
+        if uses_postgres():
+            SearchDocument.objects.filter(pk=document.pk).update(
+                vector=SearchVector('title', weight='A')
+                + SearchVector('keywords', weight='B')
+                + SearchVector('excerpt', weight='C')
+                + SearchVector('body', weight='D')
+            )
+        else:
+            SearchPosting.objects.filter(document=document).delete()
+            SearchPosting.objects.bulk_create(
+                SearchPosting(term=term, document=document, frequency=frequency)
+                for term, frequency in weighted.items()
+            )
+    bump_generation('search')
+    return document
+
+
+def search_posts(query, page_number=None, per_page=RESULTS_PER_PAGE):
+    """Return a Page of published posts ranked by relevance to ``query``."""
+    if uses_postgres():
+        search_query = SearchQuery(query, search_type='websearch')
+        posts = _listing_queryset().filter(
+            search_document__vector=search_query,
+        ).annotate(
+            rank=SearchRank(F('search_document__vector'), search_query),
+        ).order_by('-rank', '-created_at')
+        return Paginator(posts, per_page).get_page(page_number)
+
+    ranked_ids = _bm25_rank(query)
+    page = Paginator(ranked_ids, per_page).get_page(page_number)
+    posts = _listing_queryset().in_bulk(page.object_list)
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    return page
+
+
+def search_post_ids(query, limit=MAX_RESULTS):
+    """Ids of published posts matching ``query``, best first, for lookups such as the admin search"""
+    if uses_postgres():
+        return list(
+            SearchDocument.objects.filter(vector=SearchQuery(query, search_type='websearch'))
+            .values_list('post_id', flat=True)[:limit]
+        )
+    return _bm25_rank(query)[:limit]
+
+
+def _listing_queryset():
+    return Post.objects.filter(status='published').select_related('author', 'category').only(
+        'title', 'slug', 'plain_excerpt', 'featured_image', 'image_variants', 'created_at',
+        'category__name', 'category__slug', 'author__username'
+    )
+
+
+def _corpus_stats():
+    stats = cached_computation(
+        'search:stats',
+        lambda: SearchDocument.objects.aggregate(count=Count('id'), avg_length=Avg('length')),
+        3600, generations=['search'],
+    )
+    return stats['count'], stats['avg_length'] or 1.0
+
+
+def _bm25_rank(query):
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+
+    postings = defaultdict(list)
+    rows = SearchPosting.objects.filter(term__in=terms).values_list(
+        'term', 'document__post_id', 'frequency', 'document__length'
+    )
+    for term, post_id, frequency, length in rows:
+        postings[term].append((post_id, frequency, length))
+
+    total, avg_length = _corpus_stats()
+    scores = defaultdict(float)
+    for term, matches in postings.items():
+        idf = math.log(1 + (total - len(matches) + 0.5) / (len(matches) + 0.5))
+        for post_id, frequency, length in matches:
+            norm = K1 * (1 - B + B * length / avg_length)
+            scores[post_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [post_id for post_id, _ in ranked[:MAX_RESULTS]]
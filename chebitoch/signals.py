@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import suggest
+from .generations import bump_generation
+from .images import schedule_post_variants
+from .models import Category, Comment, Post, RelatedPost
+from .page_cache import SITE_TAG
+from .related import schedule_list_refill, schedule_related_refresh
+from .search import index_post
+from .surrogate import SITE_KEY, post_keys, queue_purge
+
+
+def post_page_tags(*posts):
+    """Page-cache tags rendered from the given (slug, category slug) pairs"""
+    tags = {'home'}
+    for slug, category_slug in posts:
+        tags.add(f'post:{slug}')
+        if category_slug:
+            tags.add(f'category:{category_slug}')
+    return tags
+
+
+def invalidate_post_comments(post_ids):
+    """Purge the cached comment lists of these posts and the pages showing them"""
+    posts = Post.objects.filter(pk__in=post_ids).values_list('pk', 'slug')
+    bump_generation(*(tag for pk, slug in posts for tag in (f'comments:{pk}', f'post:{slug}')))
+    queue_purge(*(f'comments-{pk}' for pk in post_ids))
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_post_location(sender, instance, raw=False, **kwargs):
+    # The old slug/category pages must be purged too when either changes
+    instance._previous_location = None
+    if instance.pk and not raw:
+        instance._previous_location = (
+            Post.objects.filter(pk=instance.pk).values_list('slug', 'category__slug').first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def update_search_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {'title', 'keywords', 'excerpt', 'content', 'status'} & set(update_fields):
+        return
+    index_post(instance)
+    # Neighbours changing shows up on their pages after the cache expires
+    post_id = instance.pk
+    transaction.on_commit(lambda: schedule_related_refresh(post_id))
+
+
+@receiver(post_delete, sender=Post)
+def drop_search_statistics(sender, instance, **kwargs):
+    # The cascade removed its SearchDocument; cached corpus statistics must not count it
+    bump_generation('search')
+
+
+@receiver(pre_delete, sender=Post)
+def refill_related_lists(sender, instance, **kwargs):
+    # The cascade drops the post from other posts' lists; refill them once it is gone
+    owner_ids = list(RelatedPost.objects.filter(related_id=instance.pk).values_list('post_id', flat=True))
+    if owner_ids:
+        transaction.on_commit(lambda: schedule_list_refill(owner_ids))
+
+
+@receiver(post_save, sender=Post)
+def build_image_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: schedule_post_variants(instance))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    locations = [(instance.slug, instance.category.slug if instance.category_id else None)]
+    previous = getattr(instance, '_previous_location', None)
+    if previous:
+        locations.append(previous)
+    bump_generation(*post_page_tags(*locations))
+    queue_purge(*post_keys(instance.pk, *(category_slug for _, category_slug in locations)))
+
+
+@receiver(post_save, sender=Post)
+def update_suggestions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not {'title', 'keywords', 'category', 'status', 'slug'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: suggest.update_post(instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def remove_suggestions(sender, instance, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: suggest.remove_post(post_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def rebuild_suggestions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(suggest.rebuild)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, **kwargs):
+    # Categories are listed in the nav of every page
+    bump_generation('categories', SITE_TAG)
+    queue_purge(SITE_KEY)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    invalidate_post_comments([instance.post_id])
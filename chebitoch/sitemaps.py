@@ -1,28 +1,53 @@
 # chebitoch/sitemaps.py
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.db.models import Count, Max
+from django.http import HttpResponse
 from django.urls import reverse
+from django.views.decorators.http import condition
+
 from .models import Post, Category
 
+SECTION_SIZE = getattr(settings, 'SITEMAP_SECTION_SIZE', 5000)
+
+
+def latest_post_change():
+    return Post.objects.filter(status='published').aggregate(latest=Max('updated_at'))['latest']
+
 
 class PostSitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.9
     protocol = 'https'
+    limit = SECTION_SIZE
 
     def items(self):
-        return Post.objects.filter(status='published')
+        # Stable order so section pages don't shift between requests
+        return Post.objects.filter(status='published').only('slug', 'updated_at').order_by('pk')
 
     def lastmod(self, obj):
         return obj.updated_at
 
+    def get_latest_lastmod(self):
+        # One aggregate instead of calling lastmod() on every post
+        return latest_post_change()
+
 
 class CategorySitemap(Sitemap):
     changefreq = "monthly"
     priority = 0.7
     protocol = 'https'
+    limit = SECTION_SIZE
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.only('slug').order_by('pk')
 
     def location(self, obj):
         return reverse('category_posts', args=[obj.slug])
@@ -40,44 +65,141 @@ class StaticViewSitemap(Sitemap):
         return reverse(item)
 
 
-# ===== UPDATE YOUR MAIN urls.py =====
-# MyBlog/urls.py
-
-from django.contrib import admin
-from django.urls import path, include
-from django.contrib.sitemaps.views import sitemap
-from django.views.generic import TemplateView
-from chebitoch.sitemaps import PostSitemap, CategorySitemap, StaticViewSitemap
-
 sitemaps = {
     'posts': PostSitemap,
     'categories': CategorySitemap,
     'static': StaticViewSitemap,
 }
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('', include('chebitoch.urls')),
-
-    # SEO URLs
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
-    path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain"), name='robots'),
-]
-
-# ===== CREATE robots.txt TEMPLATE =====
-# Create this file: chebitoch/templates/robots.txt
-
-"""
-User-agent: *
-Allow: /
-
-Sitemap: {{ request.scheme }}://{{ request.get_host }}/sitemap.xml
-
-# Block admin and sensitive areas
-Disallow: /secure-panel-93b4c7f2/
-Disallow: /media/private/
 
-# Allow images and static files
-Allow: /static/
-Allow: /media/
-"""
\ No newline at end of file
+# ===== PRE-RENDERED SECTIONS =====
+# build_sitemaps writes every section page to SITEMAP_ROOT as gzip, plus a
+# fingerprint of what they list; the views below serve those bytes directly
+# while the fingerprint still matches, so deleted, unpublished or moved posts
+# and renamed categories fall back to live rendering until the next build.
+
+def sitemap_root():
+    return getattr(settings, 'SITEMAP_ROOT', settings.BASE_DIR / 'sitemaps')
+
+
+def prebuilt_path(section=None, page=1):
+    if section is None:
+        name = 'sitemap.xml.gz'
+    elif int(page) == 1:
+        name = f'sitemap-{section}.xml.gz'
+    else:
+        name = f'sitemap-{section}-{int(page)}.xml.gz'
+    return os.path.join(sitemap_root(), name)
+
+
+def state_path():
+    return os.path.join(sitemap_root(), 'sitemap.state')
+
+
+def sitemap_state():
+    """Fingerprint of everything the sitemaps list: published posts and category slugs"""
+    posts = Post.objects.filter(status='published').aggregate(count=Count('pk'), latest=Max('updated_at'))
+    categories = Category.objects.order_by('pk').values_list('pk', 'slug')
+    digest = hashlib.md5(repr(list(categories)).encode(), usedforsecurity=False).hexdigest()
+    latest = posts['latest'].isoformat() if posts['latest'] else ''
+    return f"{posts['count']}|{latest}|{digest}"
+
+
+def _fresh_prebuilt(section=None, page=1):
+    try:
+        path = prebuilt_path(section, page)
+        mtime = os.path.getmtime(path)
+        with open(state_path()) as f:
+            built_state = f.read().strip()
+    except (OSError, ValueError):
+        return None, None
+    if built_state != sitemap_state():
+        return None, None
+    return path, mtime
+
+
+def _prebuilt(request, section=None):
+    """``_fresh_prebuilt`` for this request, checked once for the validators and the view"""
+    if not hasattr(request, '_sitemap_prebuilt'):
+        request._sitemap_prebuilt = _fresh_prebuilt(section, request.GET.get('p', 1))
+    return request._sitemap_prebuilt
+
+
+def _last_modified(request, section=None):
+    path, mtime = _prebuilt(request, section)
+    if path:
+        return datetime.fromtimestamp(int(mtime), tz=timezone.utc)
+    if section in (None, 'posts'):
+        return latest_post_change()
+    return None
+
+
+def _serve_prebuilt(request, path):
+    with open(path, 'rb') as f:
+        payload = f.read()
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(payload, content_type='application/xml')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(payload), content_type='application/xml')
+    response['Vary'] = 'Accept-Encoding'
+    response['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    return response
+
+
+@condition(last_modified_func=_last_modified)
+def sitemap_index(request):
+    path, _ = _prebuilt(request)
+    if path:
+        return _serve_prebuilt(request, path)
+    return sitemap_views.index(request, sitemaps, sitemap_url_name='sitemap_section')
+
+
+@condition(last_modified_func=_last_modified)
+def sitemap_section(request, section):
+    path, _ = _prebuilt(request, section)
+    if path:
+        return _serve_prebuilt(request, path)
+    return sitemap_views.sitemap(request, sitemaps, section=section)
+
+
+# ===== STREAMING WRITER =====
+
+def _attr(sitemap, name, item):
+    value = getattr(sitemap, name, None)
+    return value(item) if callable(value) else value
+
+
+def write_section_page(stream, sitemap, page, domain):
+    """Write one <urlset> page, iterating the queryset in chunks."""
+    stream.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    items = sitemap.paginator.page(page).object_list
+    if hasattr(items, 'iterator'):
+        items = items.iterator(chunk_size=1000)
+    for item in items:
+        location = _attr(sitemap, 'location', item)
+        stream.write(f'<url><loc>{escape(f"{sitemap.protocol}://{domain}{location}")}</loc>')
+        lastmod = _attr(sitemap, 'lastmod', item)
+        if lastmod is not None:
+            stream.write(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        changefreq = _attr(sitemap, 'changefreq', item)
+        if changefreq:
+            stream.write(f'<changefreq>{changefreq}</changefreq>')
+        priority = _attr(sitemap, 'priority', item)
+        if priority is not None:
+            stream.write(f'<priority>{priority:.1f}</priority>')
+        stream.write('</url>\n')
+    stream.write('</urlset>\n')
+
+
+def write_index(stream, section_urls):
+    stream.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for url in section_urls:
+        stream.write(f'<sitemap><loc>{escape(url)}</loc></sitemap>\n')
+    stream.write('</sitemapindex>\n')
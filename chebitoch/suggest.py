@@ -0,0 +1,256 @@
+"""Search-as-you-type suggestions from an in-memory prefix index.
+
+The index is a sorted array of title/keyword/category terms with a posting
+list of post ids per term; every query word is matched as a prefix with
+``bisect`` and the hits are ranked by views_count. Lookups never touch the
+database.
+
+The index is built from a snapshot shared through the cache, so it is built
+once for all workers. Post signals patch the snapshot and append the change
+to a short log of per-post deltas; each worker checks the head (snapshot
+version, last change) at most every SUGGEST_REFRESH_SECONDS and applies the
+deltas it missed, reloading the whole snapshot only when it was rebuilt or
+the worker fell behind the log. Category changes and the background
+rebuild after SUGGEST_REBUILD_SECONDS (to pick up new view counts) start a
+new snapshot version.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from .caching import single_flight
+from .models import Post
+from .search import STOPWORDS
+
+SNAPSHOT_KEY = 'suggest:snapshot'
+HEAD_KEY = 'suggest:head'
+DELTAS_KEY = 'suggest:deltas'
+MAX_DELTAS = 500
+MAX_QUERY_LENGTH = 100
+MAX_TERMS_PER_PREFIX = 500
+
+_WORD_RE = re.compile(r'\w+')
+
+_index = None
+_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def normalize(text):
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _entry(post):
+    words = [post.title, post.keywords.replace(',', ' ')]
+    if post.category_id:
+        words.append(post.category.name)
+    terms = sorted({word[:64] for word in normalize(' '.join(words)) if len(word) > 1})
+    return [post.title, post.get_absolute_url(), post.views_count, terms]
+
+
+def _posts():
+    return Post.objects.filter(status='published').select_related('category').only(
+        'title', 'slug', 'keywords', 'views_count', 'category__name'
+    )
+
+
+def build_snapshot():
+    snapshot = {
+        'version': time.time_ns(),
+        'seq': 0,
+        'built_at': time.time(),
+        'posts': {post.pk: _entry(post) for post in _posts().iterator(chunk_size=1000)},
+    }
+    cache.set(SNAPSHOT_KEY, snapshot, None)
+    cache.set(DELTAS_KEY, {'version': snapshot['version'], 'changes': []}, None)
+    cache.set(HEAD_KEY, (snapshot['version'], 0), None)
+    return snapshot
+
+
+class SuggestIndex:
+    def __init__(self, snapshot):
+        self.version = snapshot['version']
+        self.seq = snapshot['seq']
+        self.built_at = snapshot['built_at']
+        self.posts = snapshot['posts']
+        postings = defaultdict(list)
+        for post_id, (_, _, _, terms) in self.posts.items():
+            for term in terms:
+                postings[term].append(post_id)
+        self.terms = sorted(postings)
+        self.postings = [postings[term] for term in self.terms]
+
+    @property
+    def head(self):
+        return (self.version, self.seq)
+
+    def with_changes(self, changes):
+        """Copy of this index with ``[(seq, post_id, entry or None), ...]`` applied.
+
+        Only the touched posting lists are copied; lookups running on this
+        index in other threads are unaffected.
+        """
+        index = object.__new__(SuggestIndex)
+        index.version, index.seq, index.built_at = self.version, self.seq, self.built_at
+        index.posts = dict(self.posts)
+        index.terms, index.postings = list(self.terms), list(self.postings)
+        for seq, post_id, entry in changes:
+            old = index.posts.pop(post_id, None)
+            if old is not None:
+                index._unlink(post_id, old[3])
+            if entry is not None:
+                index.posts[post_id] = entry
+                index._link(post_id, entry[3])
+            index.seq = seq
+        return index
+
+    def _link(self, post_id, terms):
+        for term in terms:
+            position = bisect_left(self.terms, term)
+            if position < len(self.terms) and self.terms[position] == term:
+                self.postings[position] = [*self.postings[position], post_id]
+            else:
+                self.terms.insert(position, term)
+                self.postings.insert(position, [post_id])
+
+    def _unlink(self, post_id, terms):
+        for term in terms:
+            position = bisect_left(self.terms, term)
+            if position == len(self.terms) or self.terms[position] != term:
+                continue
+            remaining = [other for other in self.postings[position] if other != post_id]
+            if remaining:
+                self.postings[position] = remaining
+            else:
+                del self.terms[position], self.postings[position]
+
+    def matching(self, prefix):
+        ids = set()
+        start = bisect_left(self.terms, prefix)
+        for position in range(start, min(start + MAX_TERMS_PER_PREFIX, len(self.terms))):
+            if not self.terms[position].startswith(prefix):
+                break
+            ids.update(self.postings[position])
+        return ids
+
+    def suggest(self, query, limit=8):
+        words = normalize(query[:MAX_QUERY_LENGTH])
+        if not words:
+            return []
+        ids = None
+        # Longest words first: they have the smallest candidate sets
+        for word in sorted(set(words), key=len, reverse=True):
+            ids = self.matching(word) if ids is None else ids & self.matching(word)
+            if not ids:
+                return []
+        best = heapq.nlargest(limit, ids, key=lambda post_id: self.posts[post_id][2])
+        return [{'title': self.posts[post_id][0], 'url': self.posts[post_id][1]} for post_id in best]
+
+
+def _rebuild_in_background():
+    def run():
+        try:
+            with single_flight('suggest:build', blocking=False) as acquired:
+                if acquired:
+                    build_snapshot()
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name='suggest-rebuild', daemon=True).start()
+
+
+def _missed_changes(index, head):
+    """Deltas taking ``index`` to ``head``, or None if the log cannot (rebuilt, or trimmed past us)"""
+    version, seq = head
+    if version != index.version or seq < index.seq:
+        return None
+    deltas = cache.get(DELTAS_KEY)
+    if deltas is None or deltas['version'] != version:
+        return None
+    changes = [change for change in deltas['changes'] if change[0] > index.seq]
+    if not changes or changes[0][0] != index.seq + 1:
+        return None
+    return changes
+
+
+def _load_snapshot():
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None or 'seq' not in snapshot:
+        with single_flight('suggest:build'):
+            snapshot = cache.get(SNAPSHOT_KEY)
+            if snapshot is None or 'seq' not in snapshot:
+                snapshot = build_snapshot()
+    # The head may have been evicted while the snapshot survived
+    cache.add(HEAD_KEY, (snapshot['version'], snapshot['seq']), None)
+    return snapshot
+
+
+def get_index():
+    """This worker's index, kept up to date with the shared snapshot's deltas"""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < getattr(settings, 'SUGGEST_REFRESH_SECONDS', 2):
+        return _index
+
+    with _index_lock:
+        head = cache.get(HEAD_KEY)
+        if _index is None or head is None:
+            _index = SuggestIndex(_load_snapshot())
+        elif tuple(head) != _index.head:
+            changes = _missed_changes(_index, head)
+            _index = _index.with_changes(changes) if changes else SuggestIndex(_load_snapshot())
+        _checked_at = now
+
+    if time.time() - _index.built_at > getattr(settings, 'SUGGEST_REBUILD_SECONDS', 3600):
+        _index.built_at = time.time()  # one background rebuild per worker and period
+        _rebuild_in_background()
+    return _index
+
+
+def suggest(query, limit=8):
+    return get_index().suggest(query, limit)
+
+
+def _patch(post_id, entry):
+    """Set one post's entry (None removes it) in the shared snapshot and log the delta"""
+    with single_flight('suggest:build') as acquired:
+        if not acquired:
+            cache.delete_many([SNAPSHOT_KEY, HEAD_KEY])  # rather rebuild than miss this change
+            return
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is None or 'seq' not in snapshot:
+            return  # built from scratch on the next lookup
+        if entry is None:
+            snapshot['posts'].pop(post_id, None)
+        else:
+            snapshot['posts'][post_id] = entry
+        snapshot['seq'] += 1
+        deltas = cache.get(DELTAS_KEY)
+        if deltas is None or deltas['version'] != snapshot['version']:
+            deltas = {'version': snapshot['version'], 'changes': []}
+        deltas['changes'] = [*deltas['changes'][-(MAX_DELTAS - 1):], (snapshot['seq'], post_id, entry)]
+        cache.set(SNAPSHOT_KEY, snapshot, None)
+        cache.set(DELTAS_KEY, deltas, None)
+        cache.set(HEAD_KEY, (snapshot['version'], snapshot['seq']), None)
+
+
+def update_post(post_id):
+    post = _posts().filter(pk=post_id).first()
+    _patch(post_id, _entry(post) if post is not None else None)
+
+
+def remove_post(post_id):
+    _patch(post_id, None)
+
+
+def rebuild():
+    """Rebuild the whole snapshot, e.g. after a category rename touches many posts"""
+    with single_flight('suggest:build'):
+        build_snapshot()
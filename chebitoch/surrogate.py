@@ -0,0 +1,213 @@
+"""Surrogate keys and purging for a shared HTTP cache in front of Django.
+
+Public responses to anonymous visitors get ``Cache-Control: public`` with a
+per-view ``s-maxage`` / ``stale-while-revalidate`` policy and a
+``Surrogate-Key`` header listing what they were built from:
+
+    site                every public page (categories are in the nav)
+    listing-home        the home listing and the API post list
+    category-<slug>     a category listing
+    post-<id>           a post page or API document
+    comments-<id>       a post's comments (inline and "Load more" pages)
+
+When those objects change, the signal handlers queue the matching keys;
+they are deduplicated per transaction and sent on commit as PURGE requests
+(``SURROGATE_PURGE_METHOD``, keys space-separated in the
+``SURROGATE_PURGE_HEADER`` header, at most ``SURROGATE_PURGE_BATCH_SIZE``
+per request) to every ``SURROGATE_PURGE_ENDPOINTS`` URL over kept-alive
+connections. Without endpoints nothing is queued.
+
+Requests carrying a session or flash-message cookie are answered
+``private`` and must bypass the cache, e.g. for Varnish with xkey::
+
+    sub vcl_recv {
+        if (req.method == "PURGE") {
+            set req.http.n-gone = xkey.purge(req.http.Surrogate-Key);
+            return (synth(200, "Purged " + req.http.n-gone));
+        }
+        if (req.http.Cookie ~ "(sessionid|messages)=") { return (pass); }
+        unset req.http.Cookie;
+    }
+
+Pages answered by the shared cache are not counted as post views.
+"""
+import http.client
+import logging
+import re
+import threading
+from functools import wraps
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+from .page_cache import is_cacheable_request
+
+logger = logging.getLogger(__name__)
+
+SITE_KEY = 'site'
+
+DEFAULT_POLICY = {'max_age': 0, 's_maxage': 300, 'stale_while_revalidate': 60, 'stale_if_error': 86400}
+# Post pages are where views are counted, so they go back to Django more often
+VIEW_POLICIES = {
+    'post_detail': {'s_maxage': 120},
+    'search': {'s_maxage': 60},
+    'trending': {'s_maxage': 60},
+}
+
+_CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def cache_policy(name):
+    """Cache-Control directives for a view: defaults < VIEW_POLICIES < SURROGATE_CACHE_POLICIES"""
+    configured = getattr(settings, 'SURROGATE_CACHE_POLICIES', {})
+    return {
+        **DEFAULT_POLICY, **configured.get('default', {}),
+        **VIEW_POLICIES.get(name, {}), **configured.get(name, {}),
+    }
+
+
+def post_keys(post_id, *category_slugs):
+    """Keys of the pages showing a post: its own, the home listing and its (old and new) category"""
+    keys = {f'post-{post_id}', 'listing-home'}
+    keys.update(f'category-{slug}' for slug in category_slugs if slug)
+    return keys
+
+
+def surrogate_cache(policy, *key_patterns):
+    """Mark a view's anonymous responses as shareable and tag them with surrogate keys.
+
+    ``key_patterns`` are formatted with the view kwargs (e.g.
+    ``'category-{slug}'``); views add keys only known after the lookup by
+    setting ``response.surrogate_keys``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if not is_cacheable_request(request):
+                patch_cache_control(response, private=True)
+                return response
+            if response.status_code not in (200, 304) or response.cookies:
+                return response
+
+            # A shared copy cannot carry a per-visitor CSRF token (the comment form fetches one)...
+            if response.status_code == 200 and not response.streaming:
+                response.content = _CSRF_INPUT_RE.sub(rb'\1\2', response.content)
+            # ...nor set the visitor's CSRF cookie (and Vary: Cookie) for them
+            request.META['CSRF_COOKIE_NEEDS_UPDATE'] = False
+
+            keys = {SITE_KEY, *(pattern.format(**kwargs) for pattern in key_patterns)}
+            keys.update(getattr(response, 'surrogate_keys', ()))
+            response[getattr(settings, 'SURROGATE_KEY_HEADER', 'Surrogate-Key')] = ' '.join(sorted(keys))
+            patch_cache_control(response, public=True, **cache_policy(policy))
+            return response
+        return wrapper
+    return decorator
+
+
+class EndpointPool:
+    """Kept-alive HTTP connections to one purge endpoint, safe to share between threads"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.url = url
+        self.path = parts.path or '/'
+        self._connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self._host, self._port = parts.hostname, parts.port
+        self._timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connection_class(self._host, self._port, timeout=self._timeout), False
+
+    def _release(self, connection):
+        with self._lock:
+            self._idle.append(connection)
+
+    def request(self, method, headers):
+        """Send one request and return its status; stale kept-alive connections are retried on a new one"""
+        while True:
+            connection, reused = self._acquire()
+            try:
+                connection.request(method, self.path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                if reused:
+                    continue
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return response.status
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pending = threading.local()
+
+
+def purge_endpoints():
+    return getattr(settings, 'SURROGATE_PURGE_ENDPOINTS', [])
+
+
+def get_pool(url):
+    with _pools_lock:
+        if url not in _pools:
+            _pools[url] = EndpointPool(url, getattr(settings, 'SURROGATE_PURGE_TIMEOUT', 2))
+        return _pools[url]
+
+
+def purge_keys(keys):
+    """Send PURGE requests for ``keys`` to every endpoint now; returns {endpoint: [status, ...]}"""
+    keys = sorted(set(keys))
+    method = getattr(settings, 'SURROGATE_PURGE_METHOD', 'PURGE')
+    header = getattr(settings, 'SURROGATE_PURGE_HEADER', 'Surrogate-Key')
+    batch_size = getattr(settings, 'SURROGATE_PURGE_BATCH_SIZE', 50)
+    results = {}
+    for url in purge_endpoints():
+        pool = get_pool(url)
+        statuses = results.setdefault(url, [])
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            try:
+                status = pool.request(method, {header: ' '.join(batch)})
+            except (OSError, http.client.HTTPException) as exc:
+                logger.warning('Purge of %d key(s) at %s failed: %s', len(batch), url, exc)
+                status = None
+            else:
+                if status >= 400:
+                    logger.warning('Purge of %d key(s) at %s answered %s', len(batch), url, status)
+            statuses.append(status)
+    return results
+
+
+def _flush():
+    keys = getattr(_pending, 'keys', None)
+    if keys:
+        _pending.keys = set()
+        purge_keys(keys)
+
+
+def queue_purge(*keys):
+    """Purge ``keys`` once the current transaction commits (immediately outside one).
+
+    Keys queued in the same transaction go out together; keys from a rolled
+    back transaction are sent with the next commit, which is harmless.
+    """
+    if not keys or not purge_endpoints():
+        return
+    if not hasattr(_pending, 'keys'):
+        _pending.keys = set()
+    _pending.keys.update(keys)
+    transaction.on_commit(_flush)
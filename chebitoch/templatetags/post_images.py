@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Browsers take the first <source> they support, so the smallest encodings go first
+SOURCE_TYPES = (('avif', 'image/avif'), ('webp', 'image/webp'))
+FALLBACK_WIDTH = 640
+
+
+def _srcset(variants):
+    return ', '.join(f"{variant['url']} {variant['width']}w" for variant in variants)
+
+
+@register.simple_tag
+def responsive_image(post, sizes='100vw', css_class='', loading='lazy', fetchpriority='', itemprop=''):
+    """<picture> for a post's featured image, falling back to the original URL until its variants exist"""
+    image = post.image_variants or {}
+    extra = format_html_join('', ' {}="{}"', (
+        (name, value) for name, value in (('fetchpriority', fetchpriority), ('itemprop', itemprop)) if value
+    ))
+    if image.get('source') != post.featured_image or not image.get('variants', {}).get('jpeg'):
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async"{}>',
+            post.featured_image, post.title, css_class, loading, extra,
+        )
+
+    jpeg = image['variants']['jpeg']
+    fallback = next((variant for variant in jpeg if variant['width'] >= FALLBACK_WIDTH), jpeg[-1])
+    sources = format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+        (mime, _srcset(image['variants'][fmt]), sizes)
+        for fmt, mime in SOURCE_TYPES if image['variants'].get(fmt)
+    ))
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"{}></picture>',
+        sources, fallback['url'], _srcset(jpeg), sizes, image['width'], image['height'],
+        post.title, css_class, loading, extra,
+    )
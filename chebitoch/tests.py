@@ -1,3 +1,187 @@
-from django.test import TestCase
+from datetime import datetime, timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import analytics, counters, trending
+from .comments import approve_comments, comment_count_cached, first_comments_cached
+from .content import render_content
+from .generations import bump_generation, get_generation
+from .hll import HyperLogLog
+from .models import Category, Comment, Post
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .search import _corpus_stats
+from .surrogate import post_keys
+
+
+class ContentRenderingTests(SimpleTestCase):
+    def test_drops_scripts_and_event_handlers(self):
+        html, _ = render_content('<p onclick="steal()">Hi<script>alert(1)</script></p>')
+        self.assertEqual(html, '<p>Hi</p>')
+
+    def test_drops_unsafe_urls_and_styles(self):
+        html, _ = render_content(
+            '<a href="javascript:alert(1)">x</a><p style="background:url(evil)">t</p>'
+            '<iframe src="https://evil.example">bad</iframe>'
+        )
+        self.assertNotIn('javascript:', html)
+        self.assertNotIn('url(', html)
+        self.assertNotIn('iframe', html)
+        self.assertNotIn('bad', html)
+
+    def test_hardens_links_and_images(self):
+        html, _ = render_content('<a href="https://example.com" target="_blank">x</a><img src="/a.png">')
+        self.assertIn('rel="noopener noreferrer"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_headings_get_unique_anchors_and_toc(self):
+        html, toc = render_content('<h2>Intro</h2><h3>Intro</h3>')
+        self.assertIn('<h2 id="intro">', html)
+        self.assertIn('<h3 id="intro-2">', html)
+        self.assertEqual([entry['id'] for entry in toc], ['intro', 'intro-2'])
+
+    def test_closes_implicitly_ended_elements(self):
+        html, _ = render_content('<ul><li>a<li>b</ul>')
+        self.assertEqual(html, '<ul><li>a</li><li>b</li></ul>')
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        created_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42, 3)), (created_at, 42, 3))
+
+    def test_malformed_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('not-a-cursor')
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_estimate_and_merge(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for number in range(5000):
+            first.add(f'visitor-{number}')
+            second.add(f'visitor-{number + 2500}')
+        self.assertAlmostEqual(first.count(), 5000, delta=250)
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        self.assertAlmostEqual(merged.count(), 7500, delta=375)
+
+
+class SurrogateKeyTests(SimpleTestCase):
+    def test_post_keys(self):
+        self.assertEqual(
+            post_keys(5, 'tech', None, 'life'),
+            {'post-5', 'listing-home', 'category-tech', 'category-life'},
+        )
+
+
+class GenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_generation(self):
+        before = get_generation('home')
+        bump_generation('home')
+        self.assertNotEqual(get_generation('home'), before)
+
+
+# Large intervals keep view counting and analytics from flushing in background threads
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=10 ** 9, ANALYTICS_ROLLUP_INTERVAL=10 ** 9, IMAGE_VARIANTS_ON_SAVE=False)
+class InvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.category = Category.objects.create(name='Tech', slug='tech')
+        self.post = Post.objects.create(
+            title='First post', slug='first-post', author=self.author, category=self.category,
+            content='<p>Hello world</p>', status='published',
+        )
+
+    def tearDown(self):
+        counters._local_buffer.clear()
+        analytics._local_buffer.clear()
+        trending._ring.clear()
+
+    def get(self, path, **extra):
+        return self.client.get(path, **extra)
+
+    def assertCached(self, path):
+        self.get(path)
+        self.assertEqual(self.get(path)['X-Page-Cache'], 'hit')
+
+    def test_post_edit_purges_its_page(self):
+        self.assertCached('/post/first-post/')
+        self.post.title = 'Edited title'
+        self.post.save()
+        response = self.get('/post/first-post/')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Edited title')
+
+    def test_publishing_purges_listings(self):
+        self.assertCached('/')
+        self.assertCached('/category/tech/')
+        Post.objects.create(
+            title='Second post', slug='second-post', author=self.author, category=self.category,
+            content='<p>More</p>', status='published',
+        )
+        self.assertContains(self.get('/'), 'Second post')
+        self.assertContains(self.get('/category/tech/'), 'Second post')
+
+    def test_deleting_purges_listings(self):
+        self.assertCached('/')
+        self.post.delete()
+        self.assertNotContains(self.get('/'), 'First post')
+
+    def test_category_rename_purges_every_page(self):
+        self.assertCached('/about/')
+        self.category.name = 'Technology'
+        self.category.save()
+        self.assertContains(self.get('/about/'), 'Technology')
+
+    def test_pages_are_cached_per_host(self):
+        self.get('/about/', HTTP_HOST='evil.example')
+        response = self.get('/about/', HTTP_HOST='blog.example')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, 'evil.example')
+
+    def test_trending_change_refreshes_cached_pages(self):
+        etag = self.get('/about/')['ETag']
+        self.assertContains(self.get('/about/'), 'Nothing trending yet')
+        trending.record_hit(self.post.pk)
+        cache.delete('trending:top:5')  # as if TRENDING_REFRESH_SECONDS had passed
+        response = self.get('/about/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, 'Nothing trending yet')
+
+    def test_approving_comments_purges_cached_comments(self):
+        comment = Comment.objects.create(post=self.post, name='Ann', email='ann@example.com', content='Nice')
+        self.assertEqual(comment_count_cached(self.post.pk), 0)
+        self.assertEqual(first_comments_cached(self.post.pk)[0], [])
+        self.assertEqual(approve_comments(Comment.objects.all()), 1)
+        self.assertEqual(comment_count_cached(self.post.pk), 1)
+        self.assertEqual([c.pk for c in first_comments_cached(self.post.pk)[0]], [comment.pk])
+
+    def test_deleting_refreshes_search_statistics(self):
+        self.assertEqual(_corpus_stats()[0], 1)
+        self.post.delete()
+        self.assertEqual(_corpus_stats()[0], 0)
+
+    def test_unchanged_post_revalidates(self):
+        etag = self.get('/post/first-post/')['ETag']
+        self.assertEqual(self.get('/post/first-post/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.post.save()
+        self.assertEqual(self.get('/post/first-post/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=10 ** 9)
+class ViewCounterTests(TestCase):
+    def test_buffered_views_are_flushed(self):
+        author = User.objects.create(username='author')
+        post = Post.objects.create(title='Counted', slug='counted', author=author, content='x', status='published')
+        for _ in range(3):
+            counters.record_view(post.pk)
+        self.assertEqual(counters.flush_views(), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.views_count, 3)
+        self.assertEqual(counters.flush_views(), 0)
@@ -0,0 +1,116 @@
+"""Trending posts from time-bucketed, exponentially decayed hit counts.
+
+Hits go into hourly buckets: Redis sorted sets (ZINCRBY) on django_redis, a
+process-local ring buffer of counters otherwise. A post's score is the sum
+of its bucket counts weighted by 0.5 ** (age / half-life). The ranked top-N
+is cached, so reading the leaderboard costs O(N) in the list size.
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_backend import get_redis
+from .caching import cached_computation
+from .models import Post
+
+BUCKET_SECONDS = 3600
+
+_ring = {}
+_ring_lock = threading.Lock()
+
+
+def window_buckets():
+    return getattr(settings, 'TRENDING_WINDOW_HOURS', 48)
+
+
+def half_life_buckets():
+    return getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 12)
+
+
+def _current_bucket():
+    return int(time.time() // BUCKET_SECONDS)
+
+
+def _bucket_key(bucket):
+    return cache.make_key(f'trending:{bucket}')
+
+
+def _decay(age):
+    return 0.5 ** (age / half_life_buckets())
+
+
+def record_hit(post_id):
+    bucket = _current_bucket()
+    client = get_redis()
+    if client is not None:
+        key = _bucket_key(bucket)
+        pipe = client.pipeline()
+        pipe.zincrby(key, 1, post_id)
+        pipe.expire(key, (window_buckets() + 1) * BUCKET_SECONDS)
+        pipe.execute()
+        return
+
+    with _ring_lock:
+        slot = bucket % window_buckets()
+        if slot not in _ring or _ring[slot][0] != bucket:
+            _ring[slot] = (bucket, Counter())
+        _ring[slot][1][post_id] += 1
+
+
+def top_scores(limit):
+    """[(post_id, decayed score)] for the ``limit`` highest-scoring posts."""
+    now = _current_bucket()
+    buckets = range(now - window_buckets() + 1, now + 1)
+    client = get_redis()
+    if client is not None:
+        weights = {_bucket_key(bucket): _decay(now - bucket) for bucket in buckets}
+        scratch = cache.make_key(f'trending:union:{now}:{threading.get_ident()}')
+        pipe = client.pipeline()
+        pipe.zunionstore(scratch, weights)
+        pipe.zrevrange(scratch, 0, limit - 1, withscores=True)
+        pipe.delete(scratch)
+        _, ranked, _ = pipe.execute()
+        return [(int(post_id), score) for post_id, score in ranked]
+
+    scores = Counter()
+    with _ring_lock:
+        for bucket, counts in _ring.values():
+            if bucket in buckets:
+                weight = _decay(now - bucket)
+                for post_id, hits in counts.items():
+                    scores[post_id] += hits * weight
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def _load_trending(limit):
+    ranked = top_scores(limit * 2)  # headroom for drafts and deleted posts
+    posts = Post.objects.filter(pk__in=[post_id for post_id, _ in ranked], status='published').select_related(
+        'category'
+    ).only(
+        'title', 'slug', 'featured_image', 'image_variants', 'read_time', 'created_at', 'plain_excerpt',
+        'category__name', 'category__slug',
+    ).in_bulk()
+    trending = []
+    for post_id, score in ranked:
+        if post_id in posts:
+            post = posts[post_id]
+            post.trending_score = score
+            trending.append(post)
+    return trending[:limit]
+
+
+def trending_posts(limit=5):
+    """Cached top-``limit`` trending posts, best first."""
+    return cached_computation(
+        f'trending:top:{limit}', lambda: _load_trending(limit),
+        getattr(settings, 'TRENDING_REFRESH_SECONDS', 60),
+    )
+
+
+def trending_fingerprint(limit=5):
+    """What the trending list currently shows, for page validators"""
+    return ','.join(f'{post.pk}:{post.title}' for post in trending_posts(limit))
@@ -1,11 +1,20 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('post/<slug:slug>/', views.post_detail, name='post_detail'),
+    path('post/<slug:slug>/comment/', views.submit_comment, name='submit_comment'),
+    path('post/<slug:slug>/comments/', views.post_comments, name='post_comments'),
     path('category/<slug:slug>/', views.category_posts, name='category_posts'),
     path('about/', views.about, name='about'),
     path('search/', views.search, name='search'),
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
+    path('trending/', views.trending, name='trending'),
+    path('api/posts/', api.post_list, name='api_post_list'),
+    path('api/posts/<slug:slug>/', api.post_detail, name='api_post_detail'),
+    path('api/categories/', api.category_list, name='api_category_list'),
+    path('csrf/', views.csrf_token, name='csrf_token'),
+    path('perf/metrics/', views.perf_metrics, name='perf_metrics'),
 
 ]
\ No newline at end of file
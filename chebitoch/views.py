@@ -1,53 +1,127 @@
-from django.db.models import Q, Prefetch
+from django.db.models import Max, Q
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
+from django.urls import reverse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.core.cache import cache
-from .models import Post, Category, Comment
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from .analytics import record_visit
+from .api import json_response
+from .caching import cached_computation
+from .comments import (
+    clean_submission, comment_count_cached, comment_page, enqueue_comment, first_comments_cached,
+)
+from .conditional import conditional_page, make_etag
+from .counters import record_view
+from .metrics import snapshot
+from .models import Post, Category
+from .page_cache import cache_public_page
+from .pagination import InvalidCursor, paginate_posts
+from .related import related_posts
+from .search import search_posts
+from .suggest import suggest
+from .surrogate import surrogate_cache
+from .trending import record_hit, trending_fingerprint, trending_posts
+
+POSTS_PER_PAGE = 6
+# WSGI environ key / HTTP header marking requests made by bake and warm_cache
+SYNTHETIC_REQUEST = 'chebitoch.synthetic'
+WARMUP_HEADER = 'X-Cache-Warmup'
+SUGGESTIONS = 8
 
 
 def get_categories_cached():
-    """Cache categories for 1 hour since they don't change often"""
-    categories = cache.get('all_categories')
-    if categories is None:
-        categories = list(Category.objects.all())
-        cache.set('all_categories', categories, 3600)  # 1 hour
-    return categories
+    """Navigation categories, cached until a Category is saved or deleted"""
+    return cached_computation(
+        'all_categories', lambda: list(Category.objects.all()), 3600, generations=['categories']
+    )
+
+
+def record_post_view(request, post_id):
+    """Count a post view, whether the page was rendered or served from cache"""
+    if request.META.get(SYNTHETIC_REQUEST) or WARMUP_HEADER in request.headers:
+        return  # pages rendered by bake/warm_cache are not reader visits
+    record_view(post_id)
+    record_hit(post_id)
+    record_visit(request, post_id)
+
+
+def _record_cached_post_view(request, extras):
+    record_post_view(request, extras['post_id'])
+
+
+def _footer_state(request):
+    # Every page shows the trending footer, which changes without any edit;
+    # both the ETag and the page-cache key include it so they stay in step
+    return trending_fingerprint()
+
 
+def _page_etag(request, last_modified, *tags):
+    return make_etag(last_modified, 'categories', *tags, extra=_footer_state(request))
 
+
+def _listing_state(request, slug=None):
+    """Validators for home/category listings: newest post change + listing generation"""
+    posts = Post.objects.filter(status='published')
+    tag = 'home'
+    if slug is not None:
+        posts = posts.filter(category__slug=slug)
+        tag = f'category:{slug}'
+    last_modified = posts.aggregate(latest=Max('updated_at'))['latest']
+    return last_modified, _page_etag(request, last_modified, tag), {}
+
+
+def _post_detail_state(request, slug):
+    """Validators for a post: its own edits plus the newest approved comment"""
+    row = Post.objects.filter(slug=slug, status='published').annotate(
+        last_comment=Max('comments__created_at', filter=Q(comments__active=True))
+    ).values_list('pk', 'updated_at', 'last_comment').first()
+    if row is None:
+        return None
+    post_id, updated_at, last_comment = row
+    last_modified = max(updated_at, last_comment) if last_comment else updated_at
+    return last_modified, _page_etag(request, last_modified, f'post:{slug}'), {'post_id': post_id}
+
+
+def _about_state(request):
+    return None, _page_etag(request, None), {}
+
+
+@surrogate_cache('search', 'listing-home')
 def search(request):
     query = request.GET.get('q', '').strip()
-    results = []
+    page_obj = None
     categories = get_categories_cached()
 
     if query:
-        results = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(excerpt__icontains=query) |
-            Q(keywords__icontains=query),
-            status='published'
-        ).select_related('author', 'category').distinct()
+        # Ranked lookup against the precomputed search index (see chebitoch.search)
+        page_obj = search_posts(query, request.GET.get('page'))
 
     return render(request, 'chebitoch/search.html', {
         'query': query,
-        'results': results,
+        'page_obj': page_obj,
         'categories': categories
     })
 
 
+@surrogate_cache('home', 'listing-home')
+@conditional_page(_listing_state)
+@cache_public_page('home', extra=_footer_state)
 def home(request):
     # Optimize query with select_related to avoid N+1 queries
     posts = Post.objects.filter(status='published').select_related('author', 'category').only(
-        'title', 'slug', 'excerpt', 'content', 'featured_image',
+        'title', 'slug', 'plain_excerpt', 'read_time', 'featured_image', 'image_variants',
         'created_at', 'category__name', 'category__slug', 'author__username'
     )
     categories = get_categories_cached()
 
-    # Pagination
-    paginator = Paginator(posts, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: no COUNT(*)/OFFSET, legacy ?page= links are redirected
+    page_obj, redirect_url = paginate_posts(request, posts, POSTS_PER_PAGE, total_key='home')
+    if redirect_url:
+        return redirect(redirect_url)
 
     context = {
         'page_obj': page_obj,
@@ -56,48 +130,81 @@ def home(request):
     return render(request, 'chebitoch/home.html', context)
 
 
+@surrogate_cache('post_detail')
+@conditional_page(_post_detail_state, on_not_modified=_record_cached_post_view)
+@cache_public_page('post:{slug}', on_hit=_record_cached_post_view, extra=_footer_state)
 def post_detail(request, slug):
-    # Optimize with select_related and prefetch_related
     post = get_object_or_404(
-        Post.objects.select_related('author', 'category')
-        .prefetch_related(
-            Prefetch('comments', queryset=Comment.objects.filter(active=True))
-        ),
+        # The raw body is only needed until rerender_content has run
+        Post.objects.select_related('author', 'category').defer('content'),
         slug=slug,
         status='published'
     )
 
-    # Increment views (async in production would be better)
-    post.increment_views()
+    # Buffered write-behind counter, no row write on the request path
+    record_post_view(request, post.pk)
 
-    comments = post.comments.all()  # Already prefetched
     categories = get_categories_cached()
-
-    if request.method == 'POST':
-        name = request.POST.get('name', '').strip()
-        email = request.POST.get('email', '').strip()
-        content = request.POST.get('content', '').strip()
-
-        if name and email and content:
-            Comment.objects.create(
-                post=post,
-                name=name,
-                email=email,
-                content=content
-            )
-            messages.success(request, 'Your comment has been added and is awaiting approval!')
-            return redirect('post_detail', slug=slug)
-        else:
-            messages.error(request, 'Please fill in all fields.')
+    comments, comments_next = first_comments_cached(post.pk)
 
     context = {
         'post': post,
         'comments': comments,
+        'comments_next': comments_next,
+        'comment_count': comment_count_cached(post.pk),
+        'related_posts': related_posts(post),
         'categories': categories,
     }
-    return render(request, 'chebitoch/post_detail.html', context)
+    response = render(request, 'chebitoch/post_detail.html', context)
+    response.page_cache_extras = {'post_id': post.pk}
+    response.surrogate_keys = [f'post-{post.pk}', f'comments-{post.pk}']
+    return response
+
+
+@surrogate_cache('post_comments')
+@cache_public_page('post:{slug}')
+def post_comments(request, slug):
+    """Next page of a post's comments as an HTML fragment for "Load more" """
+    post_id = Post.objects.filter(slug=slug, status='published').values_list('pk', flat=True).first()
+    if post_id is None:
+        raise Http404('No Post matches the given query.')
+    try:
+        comments, comments_next = comment_page(post_id, request.GET.get('after'))
+    except InvalidCursor:
+        raise Http404('Invalid comments cursor.')
+    response = render(request, 'chebitoch/comment_page.html', {
+        'slug': slug,
+        'comments': comments,
+        'comments_next': comments_next,
+    })
+    response.surrogate_keys = [f'comments-{post_id}']
+    return response
+
+
+@never_cache
+def csrf_token(request):
+    """CSRF token (and cookie) for forms on pages served without one"""
+    return JsonResponse({'token': get_token(request)})
+
+
+@require_POST
+def submit_comment(request, slug):
+    post_id = Post.objects.filter(slug=slug, status='published').values_list('pk', flat=True).first()
+    if post_id is None:
+        raise Http404('No Post matches the given query.')
 
+    cleaned, error = clean_submission(request.POST)
+    if error:
+        messages.error(request, error)
+    else:
+        enqueue_comment(post_id, cleaned)
+        messages.success(request, 'Your comment has been received and is awaiting approval!')
+    return redirect(reverse('post_detail', args=[slug]) + '#comments')
 
+
+@surrogate_cache('category_posts', 'category-{slug}')
+@conditional_page(_listing_state)
+@cache_public_page('category:{slug}', extra=_footer_state)
 def category_posts(request, slug):
     category = get_object_or_404(Category, slug=slug)
 
@@ -106,15 +213,15 @@ def category_posts(request, slug):
         category=category,
         status='published'
     ).select_related('author', 'category').only(
-        'category','title', 'slug', 'excerpt', 'content', 'featured_image',
+        'category', 'title', 'slug', 'plain_excerpt', 'read_time', 'featured_image', 'image_variants',
         'created_at', 'author__username'
     )
 
     categories = get_categories_cached()
 
-    paginator = Paginator(posts, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, redirect_url = paginate_posts(request, posts, POSTS_PER_PAGE, total_key=f'category:{category.slug}')
+    if redirect_url:
+        return redirect(redirect_url)
 
     context = {
         'category': category,
@@ -124,6 +231,31 @@ def category_posts(request, slug):
     return render(request, 'chebitoch/category_posts.html', context)
 
 
+def search_suggest(request):
+    """Autocomplete titles for the search boxes, answered from the in-memory prefix index"""
+    results = suggest(request.GET.get('q', ''), SUGGESTIONS)
+    response = json_response({'results': results})
+    patch_cache_control(response, public=True, max_age=60)
+    return response
+
+
+@surrogate_cache('trending')
+def trending(request):
+    return render(request, 'chebitoch/trending.html', {
+        'posts': trending_posts(20),
+        'categories': get_categories_cached(),
+    })
+
+
+@surrogate_cache('about')
+@conditional_page(_about_state)
+@cache_public_page(extra=_footer_state)
 def about(request):
     categories = get_categories_cached()
-    return render(request, 'chebitoch/about.html', {'categories': categories})
\ No newline at end of file
+    return render(request, 'chebitoch/about.html', {'categories': categories})
+
+
+@staff_member_required
+def perf_metrics(request):
+    """Latency percentiles per view for this worker process"""
+    return JsonResponse(snapshot())
@@ -0,0 +1,109 @@
+"""Fill the caches after a deploy by requesting the public pages.
+
+URLs come from the sitemap classes: static pages, then categories, then
+posts by views_count, so the pages readers hit most are warm first. Pages
+are requested from a bounded thread pool, either in-process through the
+WSGI app (useful when the cache is shared, i.e. Redis) or over HTTP
+against the running site, which also warms per-process caches. A token
+bucket caps the request rate so warming a live site stays gentle.
+"""
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.wsgi import get_wsgi_application
+from django.urls import reverse
+
+from .sitemaps import sitemaps
+from .views import SYNTHETIC_REQUEST, WARMUP_HEADER
+from .wsgi_client import wsgi_request
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second on average, in bursts of up to ``burst``"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _sitemap_paths(name, limit=None):
+    sitemap = sitemaps[name]()
+    items = sitemap.items()
+    if name == 'posts':
+        items = items.order_by('-views_count', 'pk')[:limit]
+    return [(name, sitemap.location(item)) for item in items]
+
+
+def warm_paths(limit=None):
+    """(kind, path) pairs to warm, most valuable first; ``limit`` caps the posts"""
+    return [
+        *_sitemap_paths('static'),
+        ('api', reverse('api_post_list')),
+        ('api', reverse('api_category_list')),
+        ('sitemap', reverse('django.contrib.sitemaps.views.sitemap')),
+        *_sitemap_paths('categories'),
+        *_sitemap_paths('posts', limit),
+    ]
+
+
+def wsgi_fetcher(domain):
+    application = get_wsgi_application()
+
+    def fetch(path):
+        code, _, content = wsgi_request(application, path, HTTP_HOST=domain, **{SYNTHETIC_REQUEST: True})
+        return code, len(content)
+    return fetch
+
+
+def http_fetcher(base_url, timeout=30):
+    base_url = base_url.rstrip('/')
+
+    def fetch(path):
+        request = urllib.request.Request(base_url + path, headers={
+            'User-Agent': 'chebitoch-warm-cache/1.0',
+            WARMUP_HEADER: '1',
+            'Accept-Encoding': 'gzip',
+        })
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as exc:
+            return exc.code, 0
+    return fetch
+
+
+def warm(paths, fetch, concurrency=4, rate=10.0):
+    """Request every path; returns [(kind, path, status, seconds, bytes)]"""
+    bucket = TokenBucket(rate) if rate else None
+
+    def one(item):
+        kind, path = item
+        if bucket is not None:
+            bucket.take()
+        started = time.perf_counter()
+        try:
+            code, size = fetch(path)
+        except OSError:
+            code, size = 0, 0
+        return kind, path, code, time.perf_counter() - started, size
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, paths))
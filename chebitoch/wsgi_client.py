@@ -0,0 +1,39 @@
+"""Issue GET requests straight through a WSGI application, without a server.
+
+Used by chebitoch.bake, chebitoch.warming and the benchmark harness; kept
+out of chebitoch.bench so those modules don't pull in django.test.
+"""
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+
+def _environ(path, **extra):
+    path_info, _, query = path.partition('?')
+    environ = {
+        'PATH_INFO': path_info,
+        'QUERY_STRING': query,
+        'REQUEST_METHOD': 'GET',
+        'HTTP_HOST': 'testserver',
+        'HTTP_ACCEPT_ENCODING': 'gzip',
+        'wsgi.url_scheme': 'https',
+        'HTTPS': 'on',
+        'wsgi.input': BytesIO(),
+    }
+    environ.update(extra)
+    setup_testing_defaults(environ)
+    return environ
+
+
+def wsgi_request(application, path, **environ):
+    """Issue one GET through the WSGI app; returns (status code, headers, body bytes)."""
+    response = []
+    body = application(
+        _environ(path, **environ),
+        lambda status, headers, exc_info=None: response.extend((status, headers)),
+    )
+    try:
+        content = b''.join(body)
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+    return int(response[0].split()[0]), response[1], content